@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import changes
+from changes.cli import work_in
+
+from .generators import FakeGitHub, RepositorySpec, generate_repository
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('changes benchmarks')
+    group.addoption(
+        '--bench-commits',
+        type=int,
+        default=int(os.environ.get('CHANGES_BENCH_COMMITS', 5000)),
+        help='Commits in the synthetic repository (up to 100000)',
+    )
+    group.addoption(
+        '--bench-tags',
+        type=int,
+        default=int(os.environ.get('CHANGES_BENCH_TAGS', 500)),
+        help='Version tags in the synthetic repository (up to 5000)',
+    )
+    group.addoption(
+        '--bench-pull-requests',
+        type=int,
+        default=int(os.environ.get('CHANGES_BENCH_PULL_REQUESTS', 200)),
+        help='Merged pull requests since the latest version (up to 2000)',
+    )
+
+
+def pytest_configure(config):
+    benchmark_json = config.getoption('benchmark_json', None)
+    if benchmark_json:
+        Path(benchmark_json).parent.mkdir(parents=True, exist_ok=True)
+
+
+@pytest.fixture(scope='session')
+def repository_spec(request):
+    return RepositorySpec(
+        commits=request.config.getoption('--bench-commits'),
+        tags=request.config.getoption('--bench-tags'),
+        merged_pull_requests=request.config.getoption('--bench-pull-requests'),
+    )
+
+
+@pytest.fixture(scope='session')
+def synthetic_repository(tmp_path_factory, repository_spec):
+    return generate_repository(
+        tmp_path_factory.mktemp('synthetic_repository'), repository_spec
+    )
+
+
+@pytest.fixture
+def fake_github():
+    with FakeGitHub() as github:
+        yield github
+
+
+@pytest.fixture
+def in_synthetic_repository(synthetic_repository, tmp_path, monkeypatch):
+    changes_config_path = tmp_path.joinpath('.changes')
+    changes_config_path.write_text('[changes]\nauth_token = "foo"\n')
+    monkeypatch.setenv('CHANGES_CONFIG_FILE', str(changes_config_path))
+    monkeypatch.chdir(synthetic_repository)
+    yield Path(synthetic_repository)
+
+
+@pytest.fixture
+def initialised(in_synthetic_repository, fake_github, mocker):
+    mocker.patch('changes.cli.requests_cache')
+    with work_in():
+        yield changes.project_settings
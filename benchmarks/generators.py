@@ -0,0 +1,216 @@
+"""Synthetic repositories and a fake GitHub API for benchmarking"""
+import json
+import re
+import subprocess
+import textwrap
+
+import attr
+import responses
+
+OWNER = 'michaeljoseph'
+REPO = 'test_app'
+REMOTE_URL = f'https://github.com/{OWNER}/{REPO}.git'
+
+ISSUE_URL_PATTERN = re.compile(
+    rf'https://api\.github\.com/repos/{OWNER}/{REPO}/issues/(\d+)$'
+)
+LABELS_URL = f'https://api.github.com/repos/{OWNER}/{REPO}/labels'
+RELEASES_URL = f'https://api.github.com/repos/{OWNER}/{REPO}/releases'
+
+LABELS = ['bug', 'enhancement', 'documentation']
+COMMITTER = 'Bench Mark <bench@example.com>'
+PULL_REQUEST_BRANCH = 'pull-request'
+EPOCH = 1500000000
+
+CHANGES_TOML = textwrap.dedent(
+    """\
+    [changes]
+    releases_directory = "docs/releases"
+
+    [changes.labels.bug]
+    name = "bug"
+    description = "Bug Fixes"
+
+    [changes.labels.enhancement]
+    name = "enhancement"
+    description = "Features"
+    """
+)
+
+INITIAL_FILES = {
+    'version.txt': '{version}\n',
+    'README.md': '# Test App\n',
+    'CHANGELOG.md': '# Changelog\n\n',
+    '.changes.toml': CHANGES_TOML,
+    '.bumpversion.cfg': textwrap.dedent(
+        """\
+        [bumpversion]
+        current_version = {version}
+
+        [bumpversion:file:version.txt]
+        """
+    ),
+}
+
+
+def version_for_tag(tag_index):
+    return f'{tag_index // 10000}.{tag_index // 100 % 100}.{tag_index % 100}'
+
+
+def data(content):
+    encoded = content.encode('utf-8')
+    return b'data %d\n%s\n' % (len(encoded), encoded)
+
+
+@attr.s
+class RepositorySpec(object):
+    """
+    The shape of a synthetic repository.
+
+    Plain commits carry the tags, evenly spaced, with the latest version on
+    the last plain commit. Every merged pull request lands after it, as a
+    branch commit plus a `Merge pull request #N` merge commit.
+    """
+
+    commits = attr.ib(default=5000)
+    tags = attr.ib(default=500)
+    merged_pull_requests = attr.ib(default=200)
+
+    def __attrs_post_init__(self):
+        if self.plain_commits < max(self.tags, 1):
+            raise ValueError(f'{self} does not have enough commits to tag')
+
+    @property
+    def plain_commits(self):
+        return self.commits - 2 * self.merged_pull_requests
+
+    @property
+    def latest_version(self):
+        return version_for_tag(self.tags - 1) if self.tags else '0.0.0'
+
+
+def fast_import_stream(spec):
+    """A `git fast-import` stream that builds the repository in one process"""
+    stream = []
+    mark = 0
+    tagged_commits = {
+        (tag_index + 1) * spec.plain_commits // spec.tags - 1: tag_index
+        for tag_index in range(spec.tags)
+    }
+
+    for commit_index in range(spec.plain_commits):
+        mark += 1
+        timestamp = EPOCH + commit_index
+        stream.append(
+            b'commit refs/heads/master\nmark :%d\ncommitter %s %d +0000\n'
+            % (mark, COMMITTER.encode(), timestamp)
+        )
+        stream.append(data(f'Commit {commit_index}'))
+        if commit_index == 0:
+            for file_path, content in INITIAL_FILES.items():
+                stream.append(b'M 644 inline %s\n' % file_path.encode())
+                stream.append(data(content.format(version=spec.latest_version)))
+        else:
+            stream.append(b'from :%d\n' % (mark - 1))
+
+        if commit_index in tagged_commits:
+            stream.append(
+                b'reset refs/tags/%s\nfrom :%d\n\n'
+                % (version_for_tag(tagged_commits[commit_index]).encode(), mark)
+            )
+
+    for pull_request_number in range(1, spec.merged_pull_requests + 1):
+        timestamp = EPOCH + spec.plain_commits + 2 * pull_request_number
+        mainline_mark = mark
+        branch_name = f'feature-{pull_request_number}'
+
+        mark += 1
+        stream.append(
+            b'commit refs/heads/%s\nmark :%d\ncommitter %s %d +0000\n'
+            % (PULL_REQUEST_BRANCH.encode(), mark, COMMITTER.encode(), timestamp)
+        )
+        stream.append(data(f'Work for pull request {pull_request_number}'))
+        stream.append(b'from :%d\n' % mainline_mark)
+
+        mark += 1
+        stream.append(
+            b'commit refs/heads/master\nmark :%d\ncommitter %s %d +0000\n'
+            % (mark, COMMITTER.encode(), timestamp + 1)
+        )
+        stream.append(
+            data(
+                f'Merge pull request #{pull_request_number} from '
+                f'{OWNER}/{branch_name}'
+            )
+        )
+        stream.append(b'from :%d\nmerge :%d\n' % (mainline_mark, mark - 1))
+
+    return b''.join(stream)
+
+
+def generate_repository(repo_dir, spec):
+    """Creates a git repository shaped by `spec` in `repo_dir`"""
+
+    def run_git(*arguments, **kwargs):
+        return subprocess.run(
+            ['git', *arguments], cwd=str(repo_dir), check=True, **kwargs
+        )
+
+    run_git('init', '--quiet')
+    run_git('config', '--local', 'user.email', 'bench@example.com')
+    run_git('config', '--local', 'user.name', 'Bench Mark')
+    run_git('remote', 'add', 'origin', REMOTE_URL)
+    run_git('fast-import', '--quiet', input=fast_import_stream(spec))
+    run_git('checkout', '--quiet', '--force', 'master')
+    if spec.merged_pull_requests:
+        run_git('branch', '--quiet', '--delete', '--force', PULL_REQUEST_BRANCH)
+    return repo_dir
+
+
+def pull_request_json(pull_request_number):
+    label = LABELS[pull_request_number % len(LABELS)]
+    return {
+        'number': pull_request_number,
+        'title': f'Pull request {pull_request_number}',
+        'body': f'Description of pull request {pull_request_number}.\n' * 20,
+        'user': {'login': 'michaeljoseph'},
+        'labels': [{'id': LABELS.index(label), 'name': label}],
+    }
+
+
+@attr.s
+class FakeGitHub(object):
+    """Serves synthetic pull requests, labels and releases through `responses`"""
+
+    mock = attr.ib(
+        default=attr.Factory(
+            lambda: responses.RequestsMock(assert_all_requests_are_fired=False)
+        )
+    )
+
+    def issue(self, request):
+        pull_request_number = int(ISSUE_URL_PATTERN.match(request.url).group(1))
+        return 200, {}, json.dumps(pull_request_json(pull_request_number))
+
+    def __enter__(self):
+        self.mock.__enter__()
+        self.mock.add_callback(
+            responses.GET,
+            ISSUE_URL_PATTERN,
+            callback=self.issue,
+            content_type='application/json',
+        )
+        self.mock.add(
+            responses.GET,
+            LABELS_URL,
+            json=[{'id': index, 'name': label} for index, label in enumerate(LABELS)],
+        )
+        self.mock.add(
+            responses.POST,
+            RELEASES_URL,
+            json={'id': 1, 'upload_url': f'{RELEASES_URL}/1/assets{{?name}}'},
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.mock.__exit__(*exc_info)
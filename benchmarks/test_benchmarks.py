@@ -0,0 +1,102 @@
+from click.testing import CliRunner
+
+import changes
+from changes import changelog, cli
+from changes.models import Release
+from changes.models.repository import GitHubRepository, GitRepository, PullRequest
+
+from .generators import LABELS, pull_request_json
+
+ROUNDS = 5
+
+
+def forget_pull_requests():
+    changes.project_settings.repository.fetched_pull_requests.clear()
+
+
+def test_latest_version(benchmark, in_synthetic_repository, repository_spec):
+    repository = GitRepository()
+
+    latest_version = benchmark(lambda: repository.latest_version)
+
+    assert repository_spec.latest_version == str(latest_version)
+
+
+def test_pull_requests_since_latest_version(
+    benchmark, initialised, fake_github, repository_spec
+):
+    pull_requests = benchmark.pedantic(
+        lambda: GitHubRepository(auth_token='foo').pull_requests_since_latest_version,
+        rounds=ROUNDS,
+    )
+
+    assert repository_spec.merged_pull_requests == len(pull_requests)
+
+
+def test_release_from_pull_requests(benchmark, initialised, repository_spec):
+    release = benchmark.pedantic(
+        changes.release_from_pull_requests, setup=forget_pull_requests, rounds=ROUNDS
+    )
+
+    assert release.version != repository_spec.latest_version
+
+
+def test_generate_notes(benchmark, repository_spec):
+    pull_requests = [
+        PullRequest.from_github(pull_request_json(number))
+        for number in range(1, repository_spec.merged_pull_requests + 1)
+    ]
+    project_labels = {label: {'description': label.title()} for label in LABELS}
+
+    notes = benchmark(Release.generate_notes, project_labels, pull_requests)
+
+    assert repository_spec.merged_pull_requests == sum(
+        len(properties['pull_requests']) for properties in notes.values()
+    )
+
+
+def test_write_new_changelog(benchmark, tmp_path, repository_spec):
+    changelog_path = tmp_path.joinpath('CHANGELOG.md')
+    existing_changelog = '# Changelog\n\n' + ''.join(
+        f'* Commit {index}\n' for index in range(repository_spec.commits)
+    )
+    new_content = [
+        f'* Pull request {number}\n'
+        for number in range(repository_spec.merged_pull_requests)
+    ]
+
+    def reset_changelog():
+        changelog_path.write_text(existing_changelog)
+
+    benchmark.pedantic(
+        changelog.write_new_changelog,
+        args=('https://github.com/michaeljoseph/test_app', str(changelog_path)),
+        kwargs={'content_lines': new_content, 'dry_run': False},
+        setup=reset_changelog,
+        rounds=ROUNDS,
+    )
+
+    assert new_content[0] in changelog_path.read_text()
+
+
+def invoke(*arguments):
+    """Runs a `changes` command, which initialises the project afresh"""
+    return CliRunner().invoke(cli.main, list(arguments), catch_exceptions=False)
+
+
+def test_status(benchmark, initialised, repository_spec):
+    result = benchmark.pedantic(invoke, args=('status',), rounds=ROUNDS)
+
+    assert 0 == result.exit_code
+    assert (
+        f'{repository_spec.merged_pull_requests} changes found since '
+        f'{repository_spec.latest_version}'
+    ) in result.output
+    assert 'Proposed version bump' in result.output
+
+
+def test_stage_draft(benchmark, initialised):
+    result = benchmark.pedantic(invoke, args=('stage', '--draft'), rounds=ROUNDS)
+
+    assert 0 == result.exit_code
+    assert 'Would have created' in result.output
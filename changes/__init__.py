@@ -2,9 +2,11 @@
 from datetime import date
 from pathlib import Path
 
+from changes.classifier import CONVENTIONAL_COMMITS_CLASSIFIER, Classifier
 from changes.config import Changes, Project
+from changes.manifest import ReleaseManifest
 from changes.models import Release, ReleaseType
-from changes.models.repository import GitHubRepository
+from changes.models.repository import ConventionalCommitRepository, GitHubRepository
 
 __version__ = '0.7.0'
 __url__ = 'https://github.com/michaeljoseph/changes'
@@ -24,6 +26,12 @@ def initialise():
     """
     global settings, project_settings
 
+    if Project.uses_conventional_commits():
+        # releases come from git alone, the auth token is loaded by `authenticate`
+        settings = None
+        project_settings = Project.load(ConventionalCommitRepository())
+        return
+
     # Global changes settings
     settings = Changes.load()
 
@@ -31,6 +39,15 @@ def initialise():
     project_settings = Project.load(GitHubRepository(auth_token=settings.auth_token))
 
 
+def authenticate():
+    """Loads the GitHub auth token, if `initialise` didn't need it"""
+    global settings
+
+    if not settings:
+        settings = Changes.load()
+        project_settings.repository.auth_token = settings.auth_token
+
+
 def release_from_pull_requests():
     global project_settings
 
@@ -51,7 +68,17 @@ def release_from_pull_requests():
     ]
 
     bumpversion_part, release_type, proposed_version = determine_release(
-        repository.latest_version, descriptions, labels
+        repository.latest_version,
+        descriptions,
+        labels,
+        Classifier.from_config(
+            project_settings.classifier
+            or (
+                CONVENTIONAL_COMMITS_CLASSIFIER
+                if project_settings.conventional_commits
+                else None
+            )
+        ),
     )
 
     releases_directory = Path(project_settings.releases_directory)
@@ -65,22 +92,27 @@ def release_from_pull_requests():
         release_type=release_type,
     )
 
-    if release_files := list(releases_directory.glob('*.md')):
-        release_file = release_files[0]
-        release.release_file_path = Path(project_settings.releases_directory).joinpath(
-            release_file.name
-        )
+    manifest = ReleaseManifest.load(releases_directory)
+    if release_file := manifest.release_file(release.version):
+        release.release_file_path = release_file
         release.description = release_file.read_text()
 
     return release
 
 
-def determine_release(latest_version, descriptions, labels):
-    if 'BREAKING CHANGE' in descriptions:
-        return 'major', ReleaseType.BREAKING_CHANGE, latest_version.next_major()
-    elif 'enhancement' in labels:
-        return 'minor', ReleaseType.FEATURE, latest_version.next_minor()
-    elif 'bug' in labels:
-        return 'patch', ReleaseType.FIX, latest_version.next_patch()
-    else:
+def determine_release(latest_version, descriptions, labels, classifier=None):
+    """
+    The bumpversion part, `ReleaseType` and proposed version for a release
+    of pull requests with `descriptions` and `labels`.
+    """
+    bumpversion_part, release_type = (classifier or Classifier()).classify(
+        descriptions, labels
+    )
+    next_versions = {
+        'major': latest_version.next_major,
+        'minor': latest_version.next_minor,
+        'patch': latest_version.next_patch,
+    }
+    if bumpversion_part is None:
         return None, ReleaseType.NO_CHANGE, latest_version
+    return bumpversion_part, release_type, next_versions[bumpversion_part]()
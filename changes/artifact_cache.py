@@ -0,0 +1,150 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import attr
+
+from changes import executables, metrics, util
+from changes.models.repository import working_tree_hash
+
+log = logging.getLogger(__name__)
+
+ARTIFACT_CACHE_DIRECTORY = 'artifacts'
+ARTIFACT_CACHE_SIZE_ENVVAR = 'CHANGES_ARTIFACT_CACHE_SIZE'
+DEFAULT_ARTIFACT_CACHE_SIZE = 2 * 1024 ** 3
+MANIFEST_FILE = 'manifest.json'
+# build outputs never contribute to the key of the tree they were built from
+BUILD_OUTPUTS = ['dist', 'build', '*.egg-info']
+
+
+def interpreter_identity(interpreter):
+    """The resolved interpreter path and mtime, which change when it is upgraded"""
+    interpreter_path = executables.which(interpreter)
+    if not interpreter_path:
+        return interpreter
+    return f'{interpreter_path}@{interpreter_path.stat().st_mtime_ns}'
+
+
+def build_key(targets):
+    """
+    Content address of a build: the working tree hash plus the build
+    backend configuration (the build targets and their interpreters).
+
+    Returns `None` outside a git repository.
+    """
+    try:
+        tree_hash = working_tree_hash(excludes=BUILD_OUTPUTS)
+    except Exception as e:
+        log.info(f'Not caching build artifacts, no tree hash: {e}')
+        return None
+
+    build_configuration = {
+        'tree': tree_hash,
+        'targets': [
+            [kind, interpreter_identity(interpreter)] for kind, interpreter in targets
+        ],
+    }
+    return hashlib.sha256(
+        json.dumps(build_configuration, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def max_cache_size():
+    return int(
+        os.environ.get(ARTIFACT_CACHE_SIZE_ENVVAR) or DEFAULT_ARTIFACT_CACHE_SIZE
+    )
+
+
+def link_or_copy(source, destination):
+    destination = Path(destination)
+    if destination.exists():
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+    return destination
+
+
+@attr.s
+class ArtifactCache(object):
+    """Built distributions keyed by `build_key`, evicted least recently used"""
+
+    directory = attr.ib(
+        default=attr.Factory(lambda: util.cache_directory(ARTIFACT_CACHE_DIRECTORY))
+    )
+    max_size = attr.ib(default=attr.Factory(max_cache_size))
+
+    def entry(self, key):
+        return self.directory.joinpath(key)
+
+    def get(self, key, artifact_type, destination):
+        """Links cached artifacts for `key` into `destination`, or `None`"""
+        manifest_path = self.entry(key).joinpath(MANIFEST_FILE)
+        cache_hit = manifest_path.exists()
+        metrics.cache_lookup('artifacts', cache_hit)
+        if not cache_hit:
+            return None
+
+        # the manifest mtime records the last use
+        os.utime(manifest_path)
+        Path(destination).mkdir(parents=True, exist_ok=True)
+        return [
+            attr.evolve(
+                artifact,
+                path=link_or_copy(
+                    self.entry(key).joinpath(artifact.name),
+                    Path(destination).joinpath(artifact.name),
+                ),
+            )
+            for artifact in (
+                artifact_type(**artifact)
+                for artifact in json.loads(manifest_path.read_text())
+            )
+        ]
+
+    def put(self, key, artifacts):
+        """Stores `artifacts` under `key`, then evicts down to `max_size`"""
+        staging_directory = self.directory.joinpath(f'.{key}.{os.getpid()}.tmp')
+        shutil.rmtree(staging_directory, ignore_errors=True)
+        staging_directory.mkdir(parents=True)
+
+        for artifact in artifacts:
+            link_or_copy(artifact.path, staging_directory.joinpath(artifact.name))
+        staging_directory.joinpath(MANIFEST_FILE).write_text(
+            json.dumps(
+                [
+                    dict(attr.asdict(artifact), path=artifact.name)
+                    for artifact in artifacts
+                ],
+                indent=2,
+            )
+        )
+
+        shutil.rmtree(self.entry(key), ignore_errors=True)
+        os.replace(staging_directory, self.entry(key))
+        self.evict()
+
+    def entries(self):
+        """(last used, size, path) of every cached build, oldest first"""
+        entries = []
+        for entry in self.directory.iterdir():
+            manifest_path = entry.joinpath(MANIFEST_FILE)
+            if entry.name.startswith('.') or not manifest_path.exists():
+                continue
+            size = sum(path.stat().st_size for path in entry.iterdir())
+            entries.append((manifest_path.stat().st_mtime_ns, size, entry))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total_size <= self.max_size:
+                break
+            log.info(f'Evicting cached build artifacts {entry.name}')
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
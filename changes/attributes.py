@@ -1,45 +1,175 @@
 import ast
+import difflib
 import logging
+import os
 import tempfile
+import threading
 from pathlib import Path
 
-from plumbum.cmd import diff
+import attr
 
 log = logging.getLogger(__name__)
 
 
-# TODO: leverage bumpversion
+@attr.s
+class Attribute(object):
+    """A module-level string assignment, and the byte offsets of its literal"""
+
+    value = attr.ib()
+    start = attr.ib()
+    end = attr.ib()
+
+
+def string_literal(value, original_literal):
+    """`value` as a literal, in the quote style of the literal it replaces"""
+    quote = '"' if original_literal.lstrip(b'rRuU')[:1] == b'"' else "'"
+    literal = f'{quote}{value}{quote}'
+    if quote in value or '\\' in value or '\n' in value:
+        literal = repr(value)
+    return literal.encode('utf-8')
+
+
+@attr.s
+class ModuleAttributes(object):
+    """
+    Every module-level string assignment in a module, indexed by a single
+    parse, so that any number of attributes are read and rewritten together.
+    """
+
+    path = attr.ib(converter=Path)
+    source = attr.ib(repr=False)
+    attributes = attr.ib(default=attr.Factory(dict))
+
+    @classmethod
+    def parse(cls, path):
+        source = Path(path).read_bytes()
+        line_offsets = [0]
+        for line in source.splitlines(keepends=True):
+            line_offsets.append(line_offsets[-1] + len(line))
+
+        def offset(line_number, column):
+            # ast columns are utf-8 byte offsets
+            return line_offsets[line_number - 1] + column
+
+        attributes = {}
+        for node in ast.parse(source, filename=str(path)).body:
+            if isinstance(node, ast.Assign):
+                targets = node.targets
+            elif isinstance(node, ast.AnnAssign) and node.value is not None:
+                targets = [node.target]
+            else:
+                continue
+
+            value = node.value
+            if not (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+                continue
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    attributes[target.id] = Attribute(
+                        value=value.value,
+                        start=offset(value.lineno, value.col_offset),
+                        end=offset(value.end_lineno, value.end_col_offset),
+                    )
+        return cls(path=path, source=source, attributes=attributes)
+
+    def __contains__(self, attribute_name):
+        return attribute_name in self.attributes
+
+    def get(self, attribute_name, default=None):
+        attribute = self.attributes.get(attribute_name)
+        return attribute.value if attribute else default
+
+    def replaced(self, new_values):
+        """The module source with the `new_values` attributes spliced in"""
+        missing = set(new_values) - set(self.attributes)
+        if missing:
+            raise KeyError(f'{self.path} has no attributes {sorted(missing)}')
+
+        # the targets of a chained assignment share one literal
+        edits = {}
+        for attribute_name, new_value in new_values.items():
+            attribute = self.attributes[attribute_name]
+            span = (attribute.start, attribute.end)
+            if edits.setdefault(span, new_value) != new_value:
+                raise ValueError(
+                    f'{self.path} assigns {attribute_name} and another attribute '
+                    'in one statement, they cannot have different values'
+                )
+
+        spliced = []
+        position = 0
+        for (start, end), new_value in sorted(edits.items()):
+            spliced.append(self.source[position:start])
+            spliced.append(string_literal(new_value, self.source[start:end]))
+            position = end
+        spliced.append(self.source[position:])
+        return b''.join(spliced)
+
+    def write(self, new_values, dry_run=True):
+        """
+        Rewrites the `new_values` attributes, atomically replacing the module,
+        or logs the diff on a dry run.
+        """
+        new_source = self.replaced(new_values)
+        if dry_run:
+            log.info(
+                ''.join(
+                    difflib.unified_diff(
+                        self.source.decode('utf-8').splitlines(keepends=True),
+                        new_source.decode('utf-8').splitlines(keepends=True),
+                        fromfile=str(self.path),
+                        tofile=str(self.path),
+                    )
+                )
+            )
+            return
+
+        file_descriptor, tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f'.{self.path.name}.'
+        )
+        try:
+            with os.fdopen(file_descriptor, 'wb') as tmp_file:
+                tmp_file.write(new_source)
+            os.chmod(tmp_path, self.path.stat().st_mode)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def module_attributes(module_name):
+    """The attributes of the module's `__init__.py`, parsed once per revision"""
+    init_path = Path(f'{module_name}/__init__.py')
+    stat = init_path.stat()
+    resolved_path = str(init_path.resolve())
+    revision = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _parsed_lock:
+        parsed_revision, parsed = _parsed.get(resolved_path, (None, None))
+        if parsed_revision != revision:
+            parsed = ModuleAttributes.parse(init_path)
+            _parsed[resolved_path] = (revision, parsed)
+        return parsed
+
+
 def extract_attribute(module_name, attribute_name):
     """Extract metatdata property from a module"""
-    with open(f'{module_name}/__init__.py') as input_file:
-        for line in input_file:
-            if line.startswith(attribute_name):
-                return ast.literal_eval(line.split('=')[1].strip())
+    return module_attributes(module_name).get(attribute_name)
 
 
-def replace_attribute(module_name, attribute_name, new_value, dry_run=True):
-    """Update a metadata attribute"""
-    init_file = f'{module_name}/__init__.py'
-    _, tmp_file = tempfile.mkstemp()
+def replace_attributes(module_name, new_values, dry_run=True):
+    """Update metadata attributes, in a single rewrite of the module"""
+    module_attributes(module_name).write(new_values, dry_run=dry_run)
 
-    with open(init_file) as input_file:
-        with open(tmp_file, 'w') as output_file:
-            for line in input_file:
-                if line.startswith(attribute_name):
-                    line = "%s = '%s'\n" % (attribute_name, new_value)
 
-                output_file.write(line)
-
-    if not dry_run:
-        Path(tmp_file).copy(init_file)
-    else:
-        log.info(diff(tmp_file, init_file, retcode=None))
+def replace_attribute(module_name, attribute_name, new_value, dry_run=True):
+    """Update a metadata attribute"""
+    replace_attributes(module_name, {attribute_name: new_value}, dry_run=dry_run)
 
 
 def has_attribute(module_name, attribute_name):
     """Is this attribute present?"""
-    init_file = f'{module_name}/__init__.py'
-    return any(
-        attribute_name in init_line
-        for init_line in open(init_file).readlines()
-    )
+    return attribute_name in module_attributes(module_name)
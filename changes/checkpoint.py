@@ -0,0 +1,70 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import attr
+
+from changes import util
+
+log = logging.getLogger(__name__)
+
+CHECKPOINT_DIRECTORY = 'checkpoints'
+
+
+def serialize(value):
+    """JSON encoding for step outputs, e.g. build manifests of `Artifact`s"""
+    if attr.has(type(value)):
+        return attr.asdict(value, value_serializer=lambda _, __, item: serialize(item))
+    if isinstance(value, Path):
+        return str(value)
+    return value
+
+
+@attr.s
+class Checkpoint(object):
+    """
+    The steps of one release that have completed, with their outputs,
+    persisted after every step so that a failed release can resume.
+    """
+
+    path = attr.ib(converter=Path)
+    release = attr.ib()
+    completed = attr.ib(default=attr.Factory(dict))
+
+    @classmethod
+    def load(cls, module_name, version):
+        release = f'{module_name} {version}'
+        checkpoint_path = util.cache_directory(CHECKPOINT_DIRECTORY).joinpath(
+            hashlib.sha256(
+                f'{os.path.abspath(os.curdir)} {release}'.encode('utf-8')
+            ).hexdigest()[:16]
+            + '.json'
+        )
+        if checkpoint_path.exists():
+            checkpoint = cls(
+                path=checkpoint_path, **json.loads(checkpoint_path.read_text())
+            )
+            log.info(f'Resuming {release} after {", ".join(checkpoint.completed)}')
+            return checkpoint
+        return cls(path=checkpoint_path, release=release)
+
+    def is_complete(self, step_name):
+        return step_name in self.completed
+
+    def output(self, step_name):
+        return self.completed[step_name]
+
+    def record(self, step_name, output):
+        self.completed[step_name] = json.loads(json.dumps(output, default=serialize))
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(
+            json.dumps({'release': self.release, 'completed': self.completed})
+        )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Forgets the release, once it has completed"""
+        if self.path.exists():
+            self.path.unlink()
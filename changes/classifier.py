@@ -0,0 +1,162 @@
+import re
+from collections import deque
+
+import attr
+
+from changes.models import ReleaseType
+
+MAJOR = 'major'
+MINOR = 'minor'
+PATCH = 'patch'
+# bumpversion parts, by increasing precedence
+BUMP_PARTS = [PATCH, MINOR, MAJOR]
+RELEASE_TYPES = {
+    MAJOR: ReleaseType.BREAKING_CHANGE,
+    MINOR: ReleaseType.FEATURE,
+    PATCH: ReleaseType.FIX,
+}
+
+DEFAULT_KEYWORDS = {'BREAKING CHANGE': MAJOR}
+DEFAULT_PATTERNS = {}
+DEFAULT_LABELS = {'enhancement': MINOR, 'bug': PATCH}
+# the rules for `conventional_commits` projects, whose labels are commit types
+CONVENTIONAL_COMMITS_CLASSIFIER = {
+    'keywords': {'BREAKING CHANGE': MAJOR, 'BREAKING-CHANGE': MAJOR},
+    'patterns': {},
+    'labels': {'breaking': MAJOR, 'feat': MINOR, 'fix': PATCH, 'perf': PATCH},
+}
+
+
+@attr.s
+class KeywordAutomaton(object):
+    """An Aho-Corasick automaton, finding every keyword in one pass over a text"""
+
+    transitions = attr.ib(default=attr.Factory(lambda: [{}]), repr=False)
+    failures = attr.ib(default=attr.Factory(lambda: [0]), repr=False)
+    outputs = attr.ib(default=attr.Factory(lambda: [set()]), repr=False)
+
+    @classmethod
+    def build(cls, keywords):
+        automaton = cls()
+        for keyword in keywords:
+            state = 0
+            for character in keyword:
+                if character not in automaton.transitions[state]:
+                    automaton.transitions.append({})
+                    automaton.failures.append(0)
+                    automaton.outputs.append(set())
+                    automaton.transitions[state][character] = (
+                        len(automaton.transitions) - 1
+                    )
+                state = automaton.transitions[state][character]
+            automaton.outputs[state].add(keyword)
+
+        # breadth first, so every failure state is complete before it's used
+        states = deque(automaton.transitions[0].values())
+        while states:
+            state = states.popleft()
+            for character, next_state in automaton.transitions[state].items():
+                states.append(next_state)
+                failure = automaton.failures[state]
+                while failure and character not in automaton.transitions[failure]:
+                    failure = automaton.failures[failure]
+                automaton.failures[next_state] = automaton.transitions[failure].get(
+                    character, 0
+                )
+                automaton.outputs[next_state] |= automaton.outputs[
+                    automaton.failures[next_state]
+                ]
+        return automaton
+
+    def search(self, text):
+        """Every keyword occurring in `text`"""
+        state = 0
+        for character in text:
+            while state and character not in self.transitions[state]:
+                state = self.failures[state]
+            state = self.transitions[state].get(character, 0)
+            yield from self.outputs[state]
+
+
+def combined_patterns(patterns):
+    """One alternation of the regular expressions for each bump part"""
+    alternatives = {}
+    for pattern, part in patterns.items():
+        alternatives.setdefault(part, []).append(f'(?:{pattern})')
+    return {
+        part: re.compile('|'.join(part_patterns), re.MULTILINE)
+        for part, part_patterns in alternatives.items()
+    }
+
+
+@attr.s
+class Classifier(object):
+    """
+    Decides the bump part of a release from keywords and regular expressions
+    found in pull request titles and bodies, and from their labels.
+    """
+
+    keywords = attr.ib(default=attr.Factory(lambda: dict(DEFAULT_KEYWORDS)))
+    patterns = attr.ib(default=attr.Factory(lambda: dict(DEFAULT_PATTERNS)))
+    labels = attr.ib(default=attr.Factory(lambda: dict(DEFAULT_LABELS)))
+    automaton = attr.ib(init=False, repr=False)
+    compiled_patterns = attr.ib(init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        for part in [
+            *self.keywords.values(),
+            *self.patterns.values(),
+            *self.labels.values(),
+        ]:
+            if part not in BUMP_PARTS:
+                raise ValueError(
+                    f'Unknown bump part {part}, expected one of {BUMP_PARTS}'
+                )
+        self.automaton = KeywordAutomaton.build(self.keywords)
+        self.compiled_patterns = combined_patterns(self.patterns)
+
+    @classmethod
+    def from_config(cls, classifier_config):
+        """A classifier from the `[changes.classifier]` table of `.changes.toml`"""
+        classifier_config = classifier_config or {}
+        return cls(
+            keywords=classifier_config.get('keywords', DEFAULT_KEYWORDS),
+            patterns=classifier_config.get('patterns', DEFAULT_PATTERNS),
+            labels=classifier_config.get('labels', DEFAULT_LABELS),
+        )
+
+    def classify_texts(self, texts):
+        """
+        The highest bump part matched in `texts`, or `None`, scanning each
+        text once for keywords and stopping at the first major match.
+        """
+        highest = -1
+        for text in texts:
+            for keyword in self.automaton.search(text):
+                highest = max(highest, BUMP_PARTS.index(self.keywords[keyword]))
+                if highest == len(BUMP_PARTS) - 1:
+                    return MAJOR
+            for rank in range(len(BUMP_PARTS) - 1, highest, -1):
+                pattern = self.compiled_patterns.get(BUMP_PARTS[rank])
+                if pattern and pattern.search(text):
+                    highest = rank
+                    break
+            if highest == len(BUMP_PARTS) - 1:
+                return MAJOR
+        return BUMP_PARTS[highest] if highest >= 0 else None
+
+    def classify_labels(self, labels):
+        parts = [self.labels[label] for label in labels if label in self.labels]
+        return max(parts, key=BUMP_PARTS.index) if parts else None
+
+    def classify(self, texts, labels):
+        """The bump part and `ReleaseType` for a release, `(None, NO_CHANGE)`"""
+        parts = [
+            part
+            for part in [self.classify_texts(texts), self.classify_labels(labels)]
+            if part
+        ]
+        if not parts:
+            return None, ReleaseType.NO_CHANGE
+        part = max(parts, key=BUMP_PARTS.index)
+        return part, RELEASE_TYPES[part]
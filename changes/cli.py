@@ -5,7 +5,9 @@ import click
 import requests_cache
 
 import changes
+from changes import metrics, tracing
 from changes.commands import (
+    note,
     publish as publish_command,
     stage as stage_command,
     status as status_command,
@@ -43,6 +45,39 @@ def print_version(context, param, value):
     context.exit()
 
 
+def write_profile(profile_path, top):
+    tracing.tracer.write_chrome_trace(profile_path)
+    note(f'Wrote trace events to {profile_path}')
+    for line in tracing.tracer.summary_lines(top):
+        note(line)
+
+
+@click.option(
+    '--metrics-format',
+    help='Metrics file format, inferred from the file extension by default.',
+    type=click.Choice(metrics.FORMATS),
+    default=None,
+)
+@click.option(
+    '--metrics-file',
+    help='Writes run metrics (counts, latencies, cache hit rates) to this path.',
+    type=click.Path(dir_okay=False, writable=True),
+    envvar='CHANGES_METRICS_FILE',
+    default=None,
+)
+@click.option(
+    '--profile',
+    help='Writes timing spans as Chrome trace-event JSON to this path.',
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+)
+@click.option(
+    '--profile-top',
+    help='Number of spans to summarise after profiling.',
+    type=int,
+    default=tracing.SUMMARY_TOP,
+    show_default=True,
+)
 @click.option(
     '--dry-run',
     help='Prints (instead of executing) the operations to be performed.',
@@ -52,20 +87,49 @@ def print_version(context, param, value):
 @click.option('--verbose', help='Enables verbose output.', is_flag=True, default=False)
 @click.version_option(__version__, '-V', '--version', message=VERSION)
 @click.group(context_settings=dict(help_option_names=[u'-h', u'--help']))
-def main(dry_run, verbose):
+@click.pass_context
+def main(context, dry_run, verbose, profile, profile_top, metrics_file, metrics_format):
     """Ch-ch-changes"""
+    if metrics_file:
+        metrics_path = os.path.abspath(metrics_file)
+        context.call_on_close(
+            lambda: metrics.registry.write(metrics_path, metrics_format)
+        )
+
+    if profile:
+        tracing.tracer.enable()
+        command_span = tracing.span(f'changes {context.invoked_subcommand}', 'command')
+        command_span.__enter__()
+
+        def finish_profile():
+            command_span.__exit__(None, None, None)
+            write_profile(profile, profile_top)
+
+        context.call_on_close(finish_profile)
 
 
 @click.command()
+@click.option(
+    '--watch',
+    help='Refreshes the status whenever the repository refs change.',
+    is_flag=True,
+    default=False,
+)
 @click.argument('repo_directory', required=False)
-def status(repo_directory):
+def status(watch, repo_directory):
     """
     Shows current project release status.
     """
     repo_directory = repo_directory or '.'
 
-    with work_in(repo_directory):
-        status_command.status()
+    with work_in(repo_directory), metrics.timer('changes_step_seconds', step='status'):
+        if watch:
+            try:
+                status_command.watch()
+            except KeyboardInterrupt:
+                pass
+        else:
+            status_command.status()
 
 
 main.add_command(status)
@@ -86,7 +150,8 @@ def stage(draft, discard, repo_directory, release_name, release_description):
     """
     Stages a release
     """
-    with work_in(repo_directory):
+    step = 'discard' if discard else 'stage'
+    with work_in(repo_directory), metrics.timer('changes_step_seconds', step=step):
         if discard:
             stage_command.discard(release_name, release_description)
         else:
@@ -97,13 +162,19 @@ main.add_command(stage)
 
 
 @click.command()
+@click.option(
+    '--fast',
+    help='Commits and tags with git plumbing, in a single ref transaction.',
+    is_flag=True,
+    default=False,
+)
 @click.argument('repo_directory', default='.', required=False)
-def publish(repo_directory):
+def publish(fast, repo_directory):
     """
     Publishes a release
     """
-    with work_in(repo_directory):
-        publish_command.publish()
+    with work_in(repo_directory), metrics.timer('changes_step_seconds', step='publish'):
+        publish_command.publish(fast=fast)
 
 
 main.add_command(publish)
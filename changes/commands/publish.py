@@ -1,13 +1,16 @@
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 
 import changes
-from changes.commands import info
+from changes import version_files
+from changes.commands import error, info
+from changes.manifest import ReleaseManifest
 from changes.models import BumpVersion
+from changes.models.repository import NOTES_REF
 
 
-def publish():
+def publish(fast=False):
     repository = changes.project_settings.repository
 
     release = changes.release_from_pull_requests()
@@ -16,28 +19,69 @@ def publish():
         info('No staged release to publish')
         return
 
+    if not release.release_file_path:
+        error(f'No release notes for {release.version}, run `changes stage` first')
+        return
+
     info(f'Publishing release {release.version}')
 
-    files_to_add = BumpVersion.read_from_file(
-        Path('.bumpversion.cfg')
-    ).version_files_to_replace
-    files_to_add += ['.bumpversion.cfg', str(release.release_file_path)]
+    bumpversion = BumpVersion.discover()
+    if not version_files.only_version_changed(
+        bumpversion, repository.committed_content(bumpversion.config_path)
+    ):
+        error(
+            f'{bumpversion.config_path} has changes besides the version, '
+            'commit or stash them before publishing'
+        )
+        return
 
-    info(f"Running: git add {' '.join(files_to_add)}")
-    repository.add(files_to_add)
+    files_to_add = bumpversion.version_files_to_replace + [
+        str(bumpversion.config_path),
+        str(release.release_file_path),
+        str(ReleaseManifest.load(changes.project_settings.releases_directory).path),
+    ]
 
     commit_message = release.release_file_path.read_text(encoding='utf-8')
-    info(f'Running: git commit --message="{commit_message}"')
-    repository.commit(commit_message)
+    if fast:
+        info(f'Committing and tagging release {release.version} in one transaction')
+        repository.commit_and_tag(files_to_add, commit_message, release.version)
+    else:
+        info(f"Running: git add {' '.join(files_to_add)}")
+        repository.add(files_to_add)
 
-    info(f'Running: git tag {release.version}')
-    repository.tag(release.version)
+        info(f'Running: git commit --message="{commit_message}"')
+        repository.commit(commit_message)
+
+        info(f'Running: git tag {release.version}')
+        repository.tag(release.version)
 
     if click.confirm(f'Happy to publish release {release.version}'):
-        info('Running: git push --tags')
-        repository.push()
+        changes.authenticate()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # the draft is created and uploaded to while the tag is pushed
+            info('Creating draft GitHub Release')
+            draft_release = executor.submit(
+                repository.create_release, release, draft=True
+            )
+
+            try:
+                info(f'Pushing release {release.version} to {repository.REMOTE_NAME}')
+                if not repository.push(release.version):
+                    info(
+                        f'{repository.REMOTE_NAME} already has release {release.version}'
+                    )
+
+                if changes.project_settings.pull_request_notes:
+                    info(f'Running: git push origin {NOTES_REF}')
+                    repository.push_notes()
+            except BaseException:
+                if not draft_release.exception():
+                    info('Deleting draft GitHub Release')
+                    repository.delete_release(draft_release.result()[0])
+                raise
 
-        info('Creating GitHub Release')
-        repository.create_release(release)
+        release_response, _ = draft_release.result()
+        info('Publishing GitHub Release')
+        repository.publish_release(release_response)
 
         info(f'Published release {release.version}')
@@ -1,12 +1,13 @@
 import difflib
 from pathlib import Path
 
-import bumpversion
 import click
 import pkg_resources
 from jinja2 import Template
 
 import changes
+from changes import tracing, version_files
+from changes.manifest import ReleaseManifest
 from changes.models import BumpVersion, Release
 
 from . import STYLES, debug, error, info
@@ -22,10 +23,19 @@ def discard(release_name='', release_description=''):
 
     info(f'Discarding currently staged release {release.version}')
 
-    bumpversion = BumpVersion.read_from_file(Path('.bumpversion.cfg'))
+    bumpversion = BumpVersion.discover()
+    if not version_files.only_version_changed(
+        bumpversion, repository.committed_content(bumpversion.config_path)
+    ):
+        error(
+            f'{bumpversion.config_path} has changes besides the version, '
+            'commit or stash them before discarding'
+        )
+        return
+
     git_discard_files = bumpversion.version_files_to_replace + [
         # 'CHANGELOG.md',
-        '.bumpversion.cfg'
+        str(bumpversion.config_path)
     ]
 
     info(f"Running: git {' '.join(['checkout', '--'] + git_discard_files)}")
@@ -35,6 +45,10 @@ def discard(release_name='', release_description=''):
         info(f'Running: rm {release.release_file_path}')
         release.release_file_path.unlink()
 
+    ReleaseManifest.load(changes.project_settings.releases_directory).remove(
+        release.version
+    )
+
 
 def stage(draft, release_name='', release_description=''):
     repository = changes.project_settings.repository
@@ -50,17 +64,21 @@ def stage(draft, release_name='', release_description=''):
     info(f'Staging [{release.release_type}] release for version {release.version}')
 
     # Bumping versions
-    if BumpVersion.read_from_file(Path('.bumpversion.cfg')).current_version == str(
-        release.version
-    ):
+    bumpversion = BumpVersion.discover()
+    if bumpversion.current_version == str(release.version):
         info(f'Version already bumped to {release.version}')
     else:
-        bumpversion_arguments = (
-            BumpVersion.DRAFT_OPTIONS if draft else BumpVersion.STAGE_OPTIONS
-        ) + [release.bumpversion_part]
-
-        info(f"Running: bumpversion {' '.join(bumpversion_arguments)}")
-        bumpversion.main(bumpversion_arguments)
+        version_changes = version_files.plan_version_changes(
+            bumpversion, release.version
+        )
+        changed_paths = ' '.join(str(change.path) for change in version_changes)
+        if draft:
+            info(f'Would have updated version to {release.version} in {changed_paths}:')
+            for version_change in version_changes:
+                debug(version_change.diff)
+        else:
+            info(f'Updating version to {release.version} in {changed_paths}')
+            version_files.apply_version_changes(version_changes)
 
     # Release notes generation
     info('Generating Release')
@@ -73,7 +91,8 @@ def stage(draft, release_name='', release_description=''):
         changes.__name__, 'templates/release_notes_template.md'
     ).decode('utf8')
 
-    release_notes = Template(release_notes_template).render(release=release)
+    with tracing.span('render release notes', 'jinja'):
+        release_notes = Template(release_notes_template).render(release=release)
 
     releases_directory = Path(changes.project_settings.releases_directory)
     if not releases_directory.exists():
@@ -111,3 +130,7 @@ def stage(draft, release_name='', release_description=''):
                     release_notes_path.write_text(release_notes, encoding='utf-8')
         else:
             release_notes_path.write_text(release_notes, encoding='utf-8')
+
+        ReleaseManifest.load(releases_directory).record(
+            release.version, release_notes_path, release.release_date
+        )
@@ -1,4 +1,5 @@
 import changes
+from changes import watch as ref_watch
 
 from . import highlight, info, note
 
@@ -38,3 +39,39 @@ def status():
     if unreleased_changes:
         info(f'Computed release type {release.release_type} from changes issue tags')
         info(f'Proposed version bump {repository.latest_version} => {release.version}')
+
+
+def watch(watcher=None):
+    """
+    Shows the release status and refreshes it whenever a ref changes.
+
+    Pull requests are memoised on the repository, so a new merge only fetches
+    the newly merged pull request and a new tag only moves the version boundary.
+    """
+    watcher = watcher or ref_watch.watcher_for()
+
+    snapshot = ref_watch.ref_snapshot()
+    status()
+
+    try:
+        while watcher.wait():
+            current_snapshot = ref_watch.ref_snapshot()
+            changed_refs = ref_watch.changed_refs(snapshot, current_snapshot)
+            snapshot = current_snapshot
+            if not changed_refs:
+                continue
+
+            if new_tags := [
+                ref_name[len('refs/tags/') :]
+                for ref_name in changed_refs
+                if ref_watch.is_tag(ref_name)
+            ]:
+                info(f"Tags changed: {', '.join(new_tags)}")
+            if moved_refs := [
+                ref_name for ref_name in changed_refs if not ref_watch.is_tag(ref_name)
+            ]:
+                info(f"Refs changed: {', '.join(moved_refs)}")
+
+            status()
+    finally:
+        watcher.close()
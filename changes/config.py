@@ -82,6 +82,21 @@ class Project(object):
     repository = attr.ib(default=None)
     bumpversion = attr.ib(default=None)
     labels = attr.ib(default=attr.Factory(dict))
+    # keyword, pattern and label rules, see `changes.classifier`
+    classifier = attr.ib(default=None)
+    # derive releases from Conventional Commits, without the GitHub API
+    conventional_commits = attr.ib(default=False)
+    # cache pull requests as git notes, shared through the remote
+    pull_request_notes = attr.ib(default=False)
+
+    @staticmethod
+    def uses_conventional_commits():
+        changes_project_config_path = Path(PROJECT_CONFIG_FILE)
+        return changes_project_config_path.exists() and bool(
+            toml.load(changes_project_config_path.open())['changes'].get(
+                'conventional_commits'
+            )
+        )
 
     @classmethod
     def load(cls, repository):
@@ -116,6 +131,14 @@ class Project(object):
                 toml.dumps({'changes': attr.asdict(project_settings)})
             )
 
+        if project_settings.conventional_commits and not project_settings.labels:
+            project_settings.labels = {
+                label['name']: label for label in repository.labels
+            }
+
+        if project_settings.pull_request_notes:
+            repository.pull_request_notes = True
+
         project_settings.repository = repository
         project_settings.bumpversion = BumpVersion.load(repository.latest_version)
 
@@ -160,6 +183,11 @@ class Config:
     skip_changelog = None
     changelog_content = None
     repo = None
+    build_interpreters = None
+    shard_tests = None
+    test_workers = None
+    force_tests = None
+    impacted_tests = None
 
     def __init__(
         self,
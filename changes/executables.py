@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+from pathlib import Path
+
+import attr
+from plumbum import local
+from plumbum.commands import CommandNotFound
+
+from changes import compat
+
+log = logging.getLogger(__name__)
+
+
+def path_extensions():
+    if not compat.IS_WINDOWS:
+        return ['']
+    return [''] + os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD').lower().split(';')
+
+
+def is_executable(path):
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+@attr.s
+class ExecutableIndex(object):
+    """Every file name on `PATH`, mapped to its candidate paths in `PATH` order"""
+
+    path = attr.ib()
+    candidates = attr.ib(default=attr.Factory(dict), repr=False)
+    resolved = attr.ib(default=attr.Factory(dict), repr=False)
+
+    @classmethod
+    def scan(cls, path):
+        candidates = {}
+        for directory in path.split(os.pathsep):
+            if not directory:
+                continue
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name.lower() if compat.IS_WINDOWS else entry.name
+                candidates.setdefault(name, []).append(entry.path)
+        return cls(path=path, candidates=candidates)
+
+    @property
+    def directories(self):
+        return [directory for directory in self.path.split(os.pathsep) if directory]
+
+    def which(self, name):
+        """The first executable named `name` on `PATH`, or `None`"""
+        if name not in self.resolved:
+            self.resolved[name] = next(
+                (
+                    Path(candidate)
+                    for extension in path_extensions()
+                    for candidate in self.candidates.get(
+                        (name + extension).lower() if compat.IS_WINDOWS else name, []
+                    )
+                    if is_executable(candidate)
+                ),
+                None,
+            )
+        return self.resolved[name]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def index():
+    """The `PATH` index, rescanned only when `PATH` changes"""
+    global _index
+    path = os.environ.get('PATH', '')
+    with _index_lock:
+        if _index is None or _index.path != path:
+            _index = ExecutableIndex.scan(path)
+        return _index
+
+
+def invalidate():
+    """Forgets the `PATH` index, e.g. after installing an executable"""
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def which(name):
+    """The path of the executable `name` (a bare name or a path), or `None`"""
+    if os.sep in name or (os.altsep and os.altsep in name):
+        return Path(name) if is_executable(name) else None
+    return index().which(name)
+
+
+def command(name):
+    """A plumbum command for the executable `name`, raising `CommandNotFound`"""
+    executable_path = which(name)
+    if not executable_path:
+        raise CommandNotFound(name, index().directories)
+    return local[str(executable_path)]
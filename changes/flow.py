@@ -3,13 +3,16 @@ import logging
 import click
 
 from changes.changelog import generate_changelog
+from changes.checkpoint import Checkpoint
 from changes.config import project_config, store_settings
 from changes.packaging import (
+    Artifact,
     build_distributions,
     install_from_pypi,
     install_package,
     upload_package,
 )
+from changes.scheduler import Pipeline, Step
 from changes.vcs import (
     commit_version_change,
     create_github_release,
@@ -22,62 +25,151 @@ from changes.version import increment_version
 log = logging.getLogger(__name__)
 
 
+def github_token(context):
+    project_settings = project_config(context.module_name)
+    if not project_settings['gh_token']:
+        click.echo('You need a GitHub token for changes to create a release.')
+        click.pause(
+            'Press [enter] to launch the GitHub "New personal access '
+            'token" page, to create a token for changes.'
+        )
+        click.launch('https://github.com/settings/tokens/new')
+        project_settings['gh_token'] = click.prompt('Enter your changes token')
+
+        store_settings(context.module_name, project_settings)
+    return project_settings['gh_token']
+
+
+def create_release(context):
+    description = click.prompt('Describe this release')
+    return create_github_release(context, github_token(context), description)
+
+
+def review_release(context):
+    click.pause('Press [enter] to review and update your new release')
+    click.launch('{0}/releases/tag/{1}'.format(context.repo_url, context.new_version))
+
+
 def publish(context):
     """Publishes the project"""
     commit_version_change(context)
 
     if context.github:
-        # github token
-        project_settings = project_config(context.module_name)
-        if not project_settings['gh_token']:
-            click.echo('You need a GitHub token for changes to create a release.')
-            click.pause(
-                'Press [enter] to launch the GitHub "New personal access '
-                'token" page, to create a token for changes.'
-            )
-            click.launch('https://github.com/settings/tokens/new')
-            project_settings['gh_token'] = click.prompt('Enter your changes token')
-
-            store_settings(context.module_name, project_settings)
-        description = click.prompt('Describe this release')
-
-        upload_url = create_github_release(
-            context, project_settings['gh_token'], description
-        )
+        upload_url = create_release(context)
 
         upload_release_distributions(
             context,
-            project_settings['gh_token'],
+            github_token(context),
             build_distributions(context),
             upload_url,
         )
 
-        click.pause('Press [enter] to review and update your new release')
-        click.launch(
-            '{0}/releases/tag/{1}'.format(context.repo_url, context.new_version)
-        )
+        review_release(context)
     else:
         tag_and_push(context)
 
 
-def perform_release(context):
-    """Executes the release process."""
-    try:
-        run_tests()
+def release_steps(context, checkpoint):
+    """
+    The release steps and their dependencies: tests and changelog generation
+    are independent, and nothing is committed, tagged or released on GitHub
+    until the package installs from PyPI.
 
-        if not context.skip_changelog:
-            generate_changelog(context)
+    Steps that need an earlier step's output read it from the `checkpoint`,
+    so they work the same when that step completed in an earlier run.
+    """
 
-        increment_version(context)
+    def changelog():
+        generate_changelog(context)
+        return context.changelog_content
 
-        build_distributions(context)
+    def release():
+        if checkpoint.is_complete('generate_changelog'):
+            context.changelog_content = checkpoint.output('generate_changelog')
+        return create_release(context)
 
-        install_package(context)
+    def release_distributions():
+        upload_release_distributions(
+            context,
+            github_token(context),
+            [
+                Artifact(**artifact)
+                for artifact in checkpoint.output('build_distributions')
+            ],
+            checkpoint.output('create_github_release'),
+        )
 
-        upload_package(context)
+    def tag():
+        tag_and_push(context)
+        return context.new_version
+
+    version_steps = ['increment_version']
+    steps = [
+        Step(
+            'run_tests',
+            lambda: run_tests(
+                context.shard_tests,
+                context.test_workers,
+                context.force_tests,
+                context.impacted_tests,
+            ),
+        ),
+        # the tests run against the tree as it was before the version bump
+        Step('increment_version', lambda: increment_version(context), ['run_tests']),
+    ]
+    if not context.skip_changelog:
+        steps.append(Step('generate_changelog', changelog))
+        version_steps.append('generate_changelog')
+
+    steps += [
+        Step(
+            'build_distributions', lambda: build_distributions(context), version_steps
+        ),
+        Step(
+            'install_package', lambda: install_package(context), ['build_distributions']
+        ),
+        Step('upload_package', lambda: upload_package(context), ['install_package']),
+        Step(
+            'install_from_pypi', lambda: install_from_pypi(context), ['upload_package']
+        ),
+        Step(
+            'commit_version_change',
+            lambda: commit_version_change(context),
+            # nothing is committed or tagged unless the PyPI release installs
+            ['install_from_pypi'],
+        ),
+    ]
+    if context.github:
+        return steps + [
+            Step('create_github_release', release, ['commit_version_change']),
+            Step(
+                'upload_release_distributions',
+                release_distributions,
+                ['create_github_release', 'build_distributions'],
+            ),
+            Step(
+                'review_release',
+                lambda: review_release(context),
+                ['upload_release_distributions'],
+            ),
+        ]
+    return steps + [Step('tag_and_push', tag, ['commit_version_change'])]
 
-        install_from_pypi(context)
 
-        publish(context)
+def perform_release(context):
+    """
+    Executes the release process, resuming after the steps that completed
+    when a previous attempt at the same release failed.
+    """
+    checkpoint = Checkpoint.load(
+        context.module_name,
+        context.new_version + (' (dry run)' if context.dry_run else ''),
+    )
+    pipeline = Pipeline(release_steps(context, checkpoint), checkpoint=checkpoint)
+    try:
+        pipeline.run()
+        checkpoint.clear()
     except Exception:
         log.exception('Error releasing')
+    finally:
+        log.info(pipeline.critical_path_report())
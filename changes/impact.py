@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+import attr
+from plumbum.commands import ProcessExecutionError
+
+from changes import util
+from changes.models.repository import git, git_lines
+
+log = logging.getLogger(__name__)
+
+IMPACT_MAP_DIRECTORY = 'test-impact'
+# pytest-cov options recording which tests covered each line
+COVERAGE_ARGUMENTS = ['--cov=.', '--cov-context=test', '--cov-report=']
+# changes to these can affect any test, so they always mean a full run
+GLOBAL_TEST_INPUTS = {
+    'conftest.py',
+    'setup.py',
+    'setup.cfg',
+    'pyproject.toml',
+    'tox.ini',
+    'pytest.ini',
+}
+
+COVERED_LINES_QUERY = """
+    SELECT DISTINCT context.context, file.path FROM line_bits
+    JOIN file ON file.id = line_bits.file_id
+    JOIN context ON context.id = line_bits.context_id
+"""
+COVERED_ARCS_QUERY = """
+    SELECT DISTINCT context.context, file.path FROM arc
+    JOIN file ON file.id = arc.file_id
+    JOIN context ON context.id = arc.context_id
+"""
+
+
+def context_test_id(context):
+    """The test id of a pytest-cov context, e.g. `tests/test_a.py::test_b|run`"""
+    return context.rsplit('|', 1)[0]
+
+
+def is_test_file(path):
+    name = Path(path).name
+    return name.endswith('.py') and (
+        name.startswith('test_') or name.endswith('_test.py')
+    )
+
+
+def read_coverage_contexts(data_file, root):
+    """
+    The project files covered by each test, from a coverage data file
+    recorded with per-test contexts.
+    """
+    root = Path(root).resolve()
+    covered = {}
+    connection = sqlite3.connect(str(data_file))
+    try:
+        tables = {
+            name
+            for (name,) in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        queries = [COVERED_LINES_QUERY]
+        if 'arc' in tables:
+            queries.append(COVERED_ARCS_QUERY)
+
+        for query in queries:
+            for context, path in connection.execute(query):
+                if not context:
+                    continue
+                try:
+                    relative_path = Path(path).resolve().relative_to(root)
+                except ValueError:
+                    # outside the project, e.g. installed dependencies
+                    continue
+                covered.setdefault(context_test_id(context), set()).add(
+                    relative_path.as_posix()
+                )
+    finally:
+        connection.close()
+    return covered
+
+
+def head_commit():
+    return git('rev-parse HEAD').strip()
+
+
+def changed_files(*revisions):
+    """
+    Files changed between each of `revisions` and HEAD, plus uncommitted and
+    untracked files, relative to the current directory.
+    """
+    changed = set(git_lines('ls-files --others --exclude-standard'))
+    changed.update(git_lines('diff --relative --name-only HEAD'))
+    for revision in revisions:
+        changed.update(git_lines(f'diff --relative --name-only {revision} HEAD'))
+    return changed
+
+
+@attr.s
+class ImpactMap(object):
+    """The project files covered by each test, as of `commit`"""
+
+    commit = attr.ib()
+    tests = attr.ib(default=attr.Factory(dict))
+
+    @staticmethod
+    def path():
+        toplevel = git('rev-parse --show-toplevel').strip()
+        return util.cache_directory(IMPACT_MAP_DIRECTORY).joinpath(
+            hashlib.sha256(toplevel.encode('utf-8')).hexdigest()[:16] + '.json'
+        )
+
+    @classmethod
+    def load(cls):
+        impact_map_path = cls.path()
+        if not impact_map_path.exists():
+            return None
+        return cls(**json.loads(impact_map_path.read_text()))
+
+    def save(self):
+        self.path().write_text(json.dumps(attr.asdict(self), sort_keys=True))
+
+    def is_fresh(self):
+        """Whether the map was recorded on the history of HEAD"""
+        try:
+            git(f'merge-base --is-ancestor {self.commit} HEAD')
+            return True
+        except ProcessExecutionError:
+            return False
+
+    def affected_tests(self, changed):
+        """
+        The test files and test ids to run for the `changed` files, or `None`
+        when the change can affect any test: a global test input, or a file
+        that no recorded test covers, e.g. a data file read by the tests.
+        """
+        if GLOBAL_TEST_INPUTS.intersection(Path(path).name for path in changed):
+            return None
+
+        covered_files = {
+            path for covered_files in self.tests.values() for path in covered_files
+        }
+        if any(
+            path not in covered_files and not is_test_file(path) for path in changed
+        ):
+            return None
+
+        changed_test_files = sorted(
+            path for path in changed if is_test_file(path) and Path(path).exists()
+        )
+        affected_test_ids = sorted(
+            test_id
+            for test_id, covered_files in self.tests.items()
+            if not changed.isdisjoint(covered_files)
+            and test_id.split('::', 1)[0] not in changed_test_files
+        )
+        return changed_test_files + affected_test_ids
+
+    def update(self, covered, commit, rerun_test_files=()):
+        """Replaces the entries of every test that was (re)run"""
+        self.tests = {
+            test_id: covered_files
+            for test_id, covered_files in self.tests.items()
+            if test_id not in covered
+            and test_id.split('::', 1)[0] not in rerun_test_files
+            and Path(test_id.split('::', 1)[0]).exists()
+        }
+        self.tests.update(
+            {
+                test_id: sorted(covered_files)
+                for test_id, covered_files in covered.items()
+            }
+        )
+        self.commit = commit
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import attr
+
+from changes import metrics
+
+log = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+
+
+@attr.s
+class ManifestEntry(object):
+    """The release notes file of a version, relative to the releases directory"""
+
+    file = attr.ib()
+    date = attr.ib()
+    sha256 = attr.ib()
+
+
+def content_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+_loaded = {}
+
+
+@attr.s
+class ReleaseManifest(object):
+    """
+    An index of the release notes in a releases directory, by version, so
+    the staged release is looked up rather than found by listing the
+    directory.
+    """
+
+    path = attr.ib(converter=Path)
+    releases = attr.ib(default=attr.Factory(dict))
+
+    @property
+    def releases_directory(self):
+        return self.path.parent
+
+    @classmethod
+    def load(cls, releases_directory):
+        """The manifest of `releases_directory`, parsed once per revision"""
+        path = Path(releases_directory).joinpath(MANIFEST_FILE)
+        if not path.exists():
+            return cls(path)
+
+        stat = path.stat()
+        revision = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cache_key = str(path.resolve())
+        loaded_revision, releases = _loaded.get(cache_key, (None, None))
+        metrics.cache_lookup('release_manifest', loaded_revision == revision)
+        if loaded_revision != revision:
+            releases = json.loads(path.read_text(encoding='utf-8'))
+            _loaded[cache_key] = (revision, releases)
+
+        return cls(
+            path,
+            {version: ManifestEntry(**entry) for version, entry in releases.items()},
+        )
+
+    def release_file(self, version):
+        """
+        The release notes of `version`, or `None` if it has none.
+
+        Notes staged without a manifest are recorded when they're first
+        looked up, and notes edited since they were staged are re-recorded.
+        """
+        entry = self.releases.get(str(version))
+        if not entry:
+            return self.record_unindexed(version)
+
+        release_file = self.releases_directory.joinpath(entry.file)
+        if not release_file.exists():
+            return None
+        if content_hash(release_file) != entry.sha256:
+            log.warning(f'{release_file} was edited since it was staged')
+            self.record(version, release_file, entry.date)
+        return release_file
+
+    def record_unindexed(self, version):
+        """Records the release notes of `version` staged before the manifest"""
+        # `<version>-<release date>[-<release name>].md`
+        release_file_pattern = re.compile(
+            rf'{re.escape(str(version))}-(\d{{4}}-\d{{2}}-\d{{2}})(-.*)?\.md$'
+        )
+        release_files = sorted(
+            (match.group(1), release_file)
+            for release_file in self.releases_directory.glob('*.md')
+            if (match := release_file_pattern.match(release_file.name))
+        )
+        if not release_files:
+            return None
+
+        release_date, release_file = release_files[-1]
+        log.info(f'Recording {release_file} in {self.path}')
+        self.record(version, release_file, release_date)
+        return release_file
+
+    def record(self, version, release_file_path, release_date):
+        self.releases[str(version)] = ManifestEntry(
+            file=Path(release_file_path).name,
+            date=release_date,
+            sha256=content_hash(release_file_path),
+        )
+        self.save()
+
+    def remove(self, version):
+        if self.releases.pop(str(version), None):
+            self.save()
+
+    def save(self):
+        """Writes the manifest atomically, removing it once it's empty"""
+        if not self.releases:
+            if self.path.exists():
+                self.path.unlink()
+            return
+
+        content = json.dumps(
+            {version: attr.asdict(entry) for version, entry in self.releases.items()},
+            indent=2,
+            sort_keys=True,
+        )
+        file_descriptor, tmp_path = tempfile.mkstemp(
+            dir=self.releases_directory, prefix=f'.{MANIFEST_FILE}.'
+        )
+        try:
+            with os.fdopen(file_descriptor, 'w', encoding='utf-8') as tmp_file:
+                tmp_file.write(content + '\n')
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
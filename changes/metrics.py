@@ -0,0 +1,150 @@
+import contextlib
+import json
+import threading
+import time
+from pathlib import Path
+
+import attr
+
+OPENMETRICS = 'openmetrics'
+JSON = 'json'
+FORMATS = [OPENMETRICS, JSON]
+
+COUNTER = 'counter'
+SUMMARY = 'summary'
+
+METRICS = {
+    'changes_git_command_seconds': (SUMMARY, 'git subprocess latency in seconds'),
+    'changes_http_requests': (COUNTER, 'HTTP requests by method and status code'),
+    'changes_http_request_seconds': (SUMMARY, 'HTTP request latency in seconds'),
+    'changes_uploaded_bytes': (COUNTER, 'Bytes uploaded to release hosts'),
+    'changes_cache_hits': (COUNTER, 'Cache hits by cache'),
+    'changes_cache_misses': (COUNTER, 'Cache misses by cache'),
+    'changes_step_seconds': (SUMMARY, 'Pipeline step duration in seconds'),
+}
+
+
+def escape_label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return (
+        '{'
+        + ','.join(f'{name}="{escape_label_value(value)}"' for name, value in labels)
+        + '}'
+    )
+
+
+@attr.s
+class Registry(object):
+    """Counters and summaries keyed by metric name and label set"""
+
+    samples = attr.ib(default=attr.Factory(dict), repr=False)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), repr=False)
+
+    @staticmethod
+    def key(name, labels):
+        if name not in METRICS:
+            raise KeyError(f'Unknown metric {name}')
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self.key(name, labels)
+        with self._lock:
+            self.samples[key] = self.samples.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self.key(name, labels)
+        with self._lock:
+            count, total = self.samples.get(key, (0, 0.0))
+            self.samples[key] = (count + 1, total + value)
+
+    @contextlib.contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get(self, name, **labels):
+        return self.samples.get(self.key(name, labels))
+
+    def clear(self):
+        with self._lock:
+            self.samples.clear()
+
+    def families(self):
+        families = {}
+        for (name, labels), value in sorted(self.samples.items()):
+            families.setdefault(name, []).append((labels, value))
+        return families
+
+    def to_openmetrics(self):
+        lines = []
+        for name, samples in self.families().items():
+            metric_type, description = METRICS[name]
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.append(f'# HELP {name} {description}')
+            for labels, value in samples:
+                if metric_type == COUNTER:
+                    lines.append(f'{name}_total{format_labels(labels)} {value}')
+                else:
+                    count, total = value
+                    lines.append(f'{name}_count{format_labels(labels)} {count}')
+                    lines.append(f'{name}_sum{format_labels(labels)} {total}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self):
+        metrics = {}
+        for name, samples in self.families().items():
+            metric_type, description = METRICS[name]
+            metrics[name] = {
+                'type': metric_type,
+                'help': description,
+                'samples': [
+                    dict(
+                        labels=dict(labels),
+                        **(
+                            {'value': value}
+                            if metric_type == COUNTER
+                            else {'count': value[0], 'sum': value[1]}
+                        ),
+                    )
+                    for labels, value in samples
+                ],
+            }
+        return json.dumps(metrics, indent=2, sort_keys=True)
+
+    def write(self, metrics_path, metrics_format=None):
+        metrics_path = Path(metrics_path)
+        if not metrics_format:
+            metrics_format = JSON if metrics_path.suffix == '.json' else OPENMETRICS
+
+        metrics_path.write_text(
+            self.to_json() if metrics_format == JSON else self.to_openmetrics()
+        )
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+def timer(name, **labels):
+    return registry.timer(name, **labels)
+
+
+def cache_lookup(cache_name, hit):
+    """Counts a hit or miss for the named cache"""
+    inc('changes_cache_hits' if hit else 'changes_cache_misses', cache=cache_name)
@@ -6,6 +6,7 @@ from pathlib import Path
 
 import attr
 import click
+import toml
 
 
 class ReleaseType(str, Enum):
@@ -53,73 +54,170 @@ class Release(object):
         return project_labels
 
 
+# the configuration files bumpversion reads, in order of precedence
+BUMPVERSION_CONFIG_FILES = [
+    '.bumpversion.cfg',
+    '.bumpversion.toml',
+    'setup.cfg',
+    'pyproject.toml',
+]
+BUMPVERSION_SECTION = re.compile(r'^bumpversion:(file|part):(.+)')
+# options of bumpversion (global, or per file) that change how a version is found
+VERSION_FILE_OPTIONS = ['search', 'replace', 'parse', 'serialize']
+
+
+def read_bumpversion_settings(config_path):
+    """
+    The current version, version files and their `VERSION_FILE_OPTIONS`
+    configured in `config_path`, or `None` if it has no bumpversion
+    configuration.
+
+    Reads the ini style `[bumpversion]` sections of `.bumpversion.cfg` and
+    `setup.cfg`, and the `[tool.bumpversion]` table of TOML files.
+    """
+    config_path = Path(config_path)
+    if config_path.suffix == '.toml':
+        settings = toml.load(config_path).get('tool', {}).get('bumpversion')
+        if not settings:
+            return None
+        defaults = {
+            option: settings[option]
+            for option in VERSION_FILE_OPTIONS
+            if option in settings
+        }
+        version_files = settings.get('files', [])
+        return {
+            'current_version': settings['current_version'],
+            'version_files_to_replace': [
+                version_file['filename'] for version_file in version_files
+            ],
+            'version_file_options': {
+                version_file['filename']: options
+                for version_file in version_files
+                if (
+                    options := dict(
+                        defaults,
+                        **{
+                            option: version_file[option]
+                            for option in VERSION_FILE_OPTIONS
+                            if option in version_file
+                        },
+                    )
+                )
+            },
+        }
+
+    config = RawConfigParser()
+    with config_path.open('rt', encoding='utf-8') as config_file:
+        config.read_file(config_file)
+    if not config.has_section('bumpversion'):
+        return None
+
+    def section_options(section_name):
+        return {
+            option: config.get(section_name, option)
+            for option in VERSION_FILE_OPTIONS
+            if config.has_option(section_name, option)
+        }
+
+    defaults = section_options('bumpversion')
+    filenames = []
+    version_file_options = {}
+    for section_name in config.sections():
+        if section_name_match := BUMPVERSION_SECTION.match(section_name):
+            section_prefix, section_value = section_name_match.groups()
+            if section_prefix == 'file':
+                filenames.append(section_value)
+                if options := dict(defaults, **section_options(section_name)):
+                    version_file_options[section_value] = options
+
+    return {
+        'current_version': config.get('bumpversion', 'current_version'),
+        'version_files_to_replace': filenames,
+        'version_file_options': version_file_options,
+    }
+
+
+_parsed_configurations = {}
+
+
 @attr.s
 class BumpVersion(object):
-    DRAFT_OPTIONS = [
-        '--dry-run',
-        '--verbose',
-        '--no-commit',
-        '--no-tag',
-        '--allow-dirty',
-    ]
-    STAGE_OPTIONS = ['--verbose', '--allow-dirty', '--no-commit', '--no-tag']
-
     current_version = attr.ib()
     version_files_to_replace = attr.ib(default=attr.Factory(list))
+    config_path = attr.ib(default=Path(BUMPVERSION_CONFIG_FILES[0]), converter=Path)
+    # the `VERSION_FILE_OPTIONS` set for each version file, by file name
+    version_file_options = attr.ib(default=attr.Factory(dict))
 
     @classmethod
     def load(cls, latest_version):
-        # TODO: look in other supported bumpversion config locations
-        bumpversion = None
-        bumpversion_config_path = Path('.bumpversion.cfg')
-        if not bumpversion_config_path.exists():
-            user_supplied_versioned_file_paths = []
-
-            version_file_path_answer = None
-            input_terminator = '.'
-            while version_file_path_answer != input_terminator:
-                version_file_path_answer = click.prompt(
-                    'Enter a path to a file that contains a version number '
-                    "(enter a path of '.' when you're done selecting files)",
-                    type=click.Path(
-                        exists=True, dir_okay=True, file_okay=True, readable=True
-                    ),
-                )
-
-                if version_file_path_answer != input_terminator:
-                    user_supplied_versioned_file_paths.append(version_file_path_answer)
-
-            bumpversion = cls(
-                current_version=latest_version,
-                version_files_to_replace=user_supplied_versioned_file_paths,
+        if bumpversion := cls.discover():
+            return bumpversion
+
+        user_supplied_versioned_file_paths = []
+
+        version_file_path_answer = None
+        input_terminator = '.'
+        while version_file_path_answer != input_terminator:
+            version_file_path_answer = click.prompt(
+                'Enter a path to a file that contains a version number '
+                "(enter a path of '.' when you're done selecting files)",
+                type=click.Path(
+                    exists=True, dir_okay=True, file_okay=True, readable=True
+                ),
             )
-            bumpversion.write_to_file(bumpversion_config_path)
 
+            if version_file_path_answer != input_terminator:
+                user_supplied_versioned_file_paths.append(version_file_path_answer)
+
+        bumpversion = cls(
+            current_version=latest_version,
+            version_files_to_replace=user_supplied_versioned_file_paths,
+        )
+        bumpversion.write_to_file(bumpversion.config_path)
         return bumpversion
 
     @classmethod
-    def read_from_file(cls, config_path: Path):
-        config = RawConfigParser('')
-        config.readfp(config_path.open('rt', encoding='utf-8'))
-
-        current_version = config.get("bumpversion", 'current_version')
-
-        filenames = []
-        for section_name in config.sections():
-
-            section_name_match = re.compile("^bumpversion:(file|part):(.+)").match(
-                section_name
-            )
-
-            if not section_name_match:
-                continue
+    def discover(cls):
+        """
+        The configuration from the first of `BUMPVERSION_CONFIG_FILES` that
+        configures bumpversion, or `None`
+        """
+        for config_file in BUMPVERSION_CONFIG_FILES:
+            config_path = Path(config_file)
+            if config_path.exists() and (
+                bumpversion := cls.read_from_file(config_path, required=False)
+            ):
+                return bumpversion
+        return None
 
-            section_prefix, section_value = section_name_match.groups()
-
-            if section_prefix == "file":
-                filenames.append(section_value)
-
-        return cls(current_version=current_version, version_files_to_replace=filenames)
+    @classmethod
+    def read_from_file(cls, config_path: Path, required=True):
+        """
+        The configuration in `config_path`, parsed once for each revision of
+        the file.
+        """
+        config_path = Path(config_path)
+        stat = config_path.stat()
+        revision = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cache_key = str(config_path.resolve())
+
+        parsed_revision, settings = _parsed_configurations.get(cache_key, (None, None))
+        if parsed_revision != revision:
+            settings = read_bumpversion_settings(config_path)
+            _parsed_configurations[cache_key] = (revision, settings)
+
+        if settings is None:
+            if required:
+                raise Exception(f'No bumpversion configuration in {config_path}')
+            return None
+        # a copy, as callers extend the list of files
+        return cls(
+            current_version=settings['current_version'],
+            version_files_to_replace=list(settings['version_files_to_replace']),
+            config_path=config_path,
+            version_file_options=dict(settings['version_file_options']),
+        )
 
     def write_to_file(self, config_path: Path):
         bumpversion_cfg = textwrap.dedent(
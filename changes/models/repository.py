@@ -1,26 +1,84 @@
+import hashlib
+import json
+import logging
+import os
 import re
 import shlex
+import shutil
+import tempfile
 
 import attr
 import giturlparse
 import semantic_version
 from plumbum.cmd import git as git_command
+from plumbum.commands import ProcessExecutionError
 
-from changes import services
+from changes import metrics, services, tracing, util
 from changes.compat import IS_WINDOWS
 
-GITHUB_MERGED_PULL_REQUEST = re.compile(r'^([0-9a-f]{5,40}) Merge pull request #(\w+)')
-
+log = logging.getLogger(__name__)
 
-def git(command):
+GITHUB_MERGED_PULL_REQUEST = re.compile(r'^([0-9a-f]{5,40}) Merge pull request #(\w+)')
+# https://www.conventionalcommits.org/en/v1.0.0/#specification
+CONVENTIONAL_COMMIT = re.compile(
+    r'^(?P<type>\w+)(?:\((?P<scope>[^)]*)\))?(?P<breaking>!)?: (?P<subject>.+)$'
+)
+BREAKING_CHANGE_LABEL = 'breaking'
+# unit and record separators between `git log` fields and commits
+FIELD_SEPARATOR = '\x1f'
+RECORD_SEPARATOR = '\x1e'
+# pull request metadata, noted on each merge commit
+NOTES_REF = 'refs/notes/changes'
+REMOTE_NOTES_REF = 'refs/notes/remotes/origin/changes'
+REMOTE_REFS_CACHE_DIRECTORY = 'remote-refs'
+
+
+def git_subcommand(command):
+    """The git subcommand name, skipping any global `-c name=value` options"""
+    arguments = iter(command)
+    for argument in arguments:
+        if argument == '-c':
+            next(arguments, None)
+        elif not argument.startswith('-'):
+            return argument
+    return ''
+
+
+def git(command, env=None, stdin=None):
     command = shlex.split(command, posix=not IS_WINDOWS)
-    return git_command[command]()
+    subcommand = git_subcommand(command)
+    with tracing.span(
+        f'git {subcommand}', 'git', command=' '.join(command)
+    ), metrics.timer('changes_git_command_seconds', subcommand=subcommand):
+        bound_command = (git_command.with_env(**env) if env else git_command)[command]
+        return (bound_command << stdin)() if stdin is not None else bound_command()
 
 
 def git_lines(command):
     return git(command).splitlines()
 
 
+def working_tree_hash(excludes=()):
+    """
+    The tree object id of the working tree as it is on disk, including
+    uncommitted and untracked (but not ignored) files.
+
+    Stages everything into a throwaway copy of the index, so the real index
+    is left untouched.
+    """
+    index_path = git('rev-parse --git-path index').strip()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_index_path = os.path.join(tmp_dir, 'index')
+        if os.path.exists(index_path):
+            # reuses the cached stat information of unchanged files
+            shutil.copyfile(index_path, tmp_index_path)
+
+        env = {'GIT_INDEX_FILE': tmp_index_path}
+        pathspecs = ' '.join(f"':(exclude){exclude}'" for exclude in excludes)
+        git(f'add --all -- . {pathspecs}', env=env)
+        return git('write-tree', env=env).strip()
+
+
 @attr.s
 class GitRepository(object):
     VERSION_ZERO = semantic_version.Version('0.0.0')
@@ -87,6 +145,13 @@ class GitRepository(object):
     def latest_version(self) -> semantic_version.Version:
         return max(self.versions) if self.versions else self.VERSION_ZERO
 
+    @property
+    def latest_version_revision(self):
+        """The tag of the latest version, or the first commit before any release"""
+        if self.latest_version == self.VERSION_ZERO:
+            return self.first_commit_sha.strip()
+        return str(self.latest_version)
+
     def merges_since(self, version=None):
         if version == semantic_version.Version('0.0.0'):
             version = self.first_commit_sha
@@ -95,6 +160,25 @@ class GitRepository(object):
 
         return git(f'log --oneline --merges --no-color{revision_range}').split('\n')
 
+    def commits_since(self, version=None):
+        """
+        The abbreviated sha, author, subject and body of every non-merge
+        commit since `version`, read in a single `git log`.
+        """
+        if version == semantic_version.Version('0.0.0'):
+            version = self.first_commit_sha.strip()
+
+        revision_range = f' {version}..HEAD' if version else ''
+        log_format = '%x1f'.join(['%h', '%an', '%s', '%b']) + '%x1e'
+
+        return [
+            record.lstrip('\n').split(FIELD_SEPARATOR)
+            for record in git(
+                f'log --no-merges --no-color --format={log_format}{revision_range}'
+            ).split(RECORD_SEPARATOR)
+            if record.strip()
+        ]
+
     @property
     def merges_since_latest_version(self):
         return self.merges_since(self.latest_version)
@@ -118,7 +202,14 @@ class GitRepository(object):
     @staticmethod
     def commit(message):
         # FIXME: message is one token
-        return git_command['commit', f'--message="{message}"']()
+        with tracing.span('git commit', 'git'), metrics.timer(
+            'changes_git_command_seconds', subcommand='commit'
+        ):
+            return git_command['commit', f'--message="{message}"']()
+
+    @staticmethod
+    def committed_content(path):
+        return git(f'show HEAD:{path}').encode('utf-8')
 
     @staticmethod
     def discard(file_paths):
@@ -132,13 +223,176 @@ class GitRepository(object):
         )
 
     @staticmethod
-    def push():
-        return git('push --tags')
+    def commit_and_tag(files_to_add, message, version):
+        """
+        Commits `files_to_add` and tags the commit `version` with git plumbing,
+        bypassing hooks, and moves the branch and creates the tag in a single
+        ref transaction.
+
+        The commit is built in a copy of the index, which only replaces the
+        real index once the transaction succeeds, so a failed transaction
+        leaves the index and every ref as they were.
+        """
+        parent = git('rev-parse --verify HEAD').strip()
+        branch_ref = git('symbolic-ref HEAD').strip()
+        index_path = git('rev-parse --git-path index').strip()
+
+        file_descriptor, tmp_index_path = tempfile.mkstemp(
+            dir=os.path.dirname(index_path) or '.', prefix='index.changes-'
+        )
+        os.close(file_descriptor)
+        in_transaction = False
+        try:
+            if os.path.exists(index_path):
+                shutil.copyfile(index_path, tmp_index_path)
+            else:
+                os.unlink(tmp_index_path)
+
+            env = {'GIT_INDEX_FILE': tmp_index_path}
+            git(f"update-index --add --remove -- {' '.join(files_to_add)}", env=env)
+            tree = git('write-tree', env=env).strip()
+            commit = git(
+                f'commit-tree {tree} -p {parent} -m {shlex.quote(message)}'
+            ).strip()
+
+            tagger = git('var GIT_COMMITTER_IDENT').strip()
+            tag = git(
+                'mktag',
+                stdin=(
+                    f'object {commit}\ntype commit\ntag {version}\n'
+                    f'tagger {tagger}\n\n{version}\n'
+                ),
+            ).strip()
+
+            in_transaction = True
+            git(
+                'update-ref --stdin',
+                stdin=(
+                    f'update {branch_ref} {commit} {parent}\n'
+                    f'create refs/tags/{version} {tag}\n'
+                ),
+            )
+        except BaseException:
+            # git aborts a failed ref transaction as a whole
+            if in_transaction:
+                log.error(f'Rolled back release commit and tag {version}')
+            if os.path.exists(tmp_index_path):
+                os.unlink(tmp_index_path)
+            raise
+
+        os.replace(tmp_index_path, index_path)
+        return commit, tag
+
+    @property
+    def push_url(self):
+        return git(f'remote get-url --push {self.REMOTE_NAME}').strip()
+
+    @property
+    def remote_refs_path(self):
+        remote_key = hashlib.sha256(self.push_url.encode('utf-8')).hexdigest()
+        return util.cache_directory(REMOTE_REFS_CACHE_DIRECTORY).joinpath(
+            f'{remote_key}.json'
+        )
+
+    def remote_refs(self, ref_names):
+        """
+        The objects the push remote's refs point at, from a cached snapshot,
+        refreshed by an `ls-remote` of only `ref_names` when any is missing
+        """
+        remote_refs_path = self.remote_refs_path
+        snapshot = (
+            json.loads(remote_refs_path.read_text())
+            if remote_refs_path.exists()
+            else {}
+        )
+        cache_hit = all(ref_name in snapshot for ref_name in ref_names)
+        metrics.cache_lookup('remote_refs', cache_hit)
+        if not cache_hit:
+            for line in git_lines(f"ls-remote {self.push_url} {' '.join(ref_names)}"):
+                object_name, ref_name = line.split('\t')
+                snapshot[ref_name] = object_name
+            self.save_remote_refs(snapshot)
+        return snapshot
+
+    def save_remote_refs(self, snapshot):
+        self.remote_refs_path.write_text(json.dumps(snapshot, sort_keys=True))
+
+    def push(self, version):
+        """
+        Atomically pushes the current branch and the `version` tag, and only
+        them, returning `False` without pushing when the remote has both.
+        """
+        branch_ref = git('symbolic-ref HEAD').strip()
+        release_refs = {
+            ref_name: git(f'rev-parse {ref_name}').strip()
+            for ref_name in [branch_ref, f'refs/tags/{version}']
+        }
+
+        snapshot = self.remote_refs(list(release_refs))
+        if all(
+            snapshot.get(ref_name) == object_name
+            for ref_name, object_name in release_refs.items()
+        ):
+            return False
+
+        refspecs = ' '.join(f'{ref_name}:{ref_name}' for ref_name in release_refs)
+        git(f'push --atomic {self.REMOTE_NAME} {refspecs}')
+        snapshot.update(release_refs)
+        self.save_remote_refs(snapshot)
+        return True
+
+    def push_notes(self):
+        """Shares our notes, returning `False` when there are none"""
+        try:
+            git(f'show-ref --verify --quiet {NOTES_REF}')
+        except ProcessExecutionError:
+            return False
+        git(f'push {self.REMOTE_NAME} {NOTES_REF}')
+        return True
+
+    def fetch_notes(self):
+        """
+        Merges the remote's notes into ours, returning `False` when the remote
+        has no notes yet
+        """
+        try:
+            git(f'fetch {self.REMOTE_NAME} +{NOTES_REF}:{REMOTE_NOTES_REF}')
+        except ProcessExecutionError:
+            log.debug(f'No {NOTES_REF} on {self.REMOTE_NAME}')
+            return False
+        git(f'notes --ref={NOTES_REF} merge --strategy=theirs {REMOTE_NOTES_REF}')
+        return True
+
+    @staticmethod
+    def read_notes(commits):
+        """The note on each of `commits` that has one, read in a single `git log`"""
+        if not commits:
+            return {}
+        # one record per commit, in the order given
+        records = git(
+            f'log --no-walk=unsorted --notes={NOTES_REF} --format=%N%x1e '
+            + ' '.join(commits)
+        ).split(RECORD_SEPARATOR)
+        notes = {}
+        for commit, note in zip(commits, records):
+            if note.strip():
+                notes[commit] = note.strip()
+        return notes
+
+    @staticmethod
+    def write_note(commit, note):
+        note = shlex.quote(note)
+        return git(f'notes --ref={NOTES_REF} add --force --message={note} {commit}')
 
 
 @attr.s
 class GitHubRepository(GitRepository):
     api = attr.ib(default=None)
+    # share fetched pull requests as notes on their merge commits
+    pull_request_notes = attr.ib(default=False)
+    # pull requests are immutable once merged, only fetch each one once
+    fetched_pull_requests = attr.ib(default=attr.Factory(dict), init=False, repr=False)
+    fetched_notes = attr.ib(default=False, init=False, repr=False)
 
     def __attrs_post_init__(self):
         self.api = services.GitHub(self)
@@ -147,27 +401,102 @@ class GitHubRepository(GitRepository):
     def labels(self):
         return self.api.labels()
 
+    def pull_request(self, pull_request_number, merge_commit=None):
+        if pull_request_number not in self.fetched_pull_requests:
+            pull_request = PullRequest.from_github(
+                self.api.pull_request(pull_request_number)
+            )
+            if self.pull_request_notes and merge_commit:
+                self.write_note(merge_commit, pull_request.to_note())
+            self.fetched_pull_requests[pull_request_number] = pull_request
+        return self.fetched_pull_requests[pull_request_number]
+
+    def load_pull_request_notes(self, merged_pull_requests):
+        """
+        Reads the pull requests noted on their merge commits, so that only
+        the rest are fetched from GitHub
+        """
+        if not self.fetched_notes:
+            self.fetch_notes()
+            self.fetched_notes = True
+
+        unfetched = {
+            merge_commit: pull_request_number
+            for merge_commit, pull_request_number in merged_pull_requests
+            if pull_request_number not in self.fetched_pull_requests
+        }
+        notes = self.read_notes(list(unfetched))
+        for merge_commit, pull_request_number in unfetched.items():
+            metrics.cache_lookup('git_notes', merge_commit in notes)
+            if merge_commit in notes:
+                self.fetched_pull_requests[pull_request_number] = PullRequest.from_note(
+                    notes[merge_commit]
+                )
+
     @property
     def pull_requests_since_latest_version(self):
+        merged_pull_requests = self.merged_pull_requests_since_latest_version
+        if self.pull_request_notes:
+            self.load_pull_request_notes(merged_pull_requests)
         return [
-            PullRequest.from_github(self.api.pull_request(pull_request_number))
-            for pull_request_number in self.pull_request_numbers_since_latest_version
+            self.pull_request(pull_request_number, merge_commit=merge_commit)
+            for merge_commit, pull_request_number in merged_pull_requests
         ]
 
     @property
     def pull_request_numbers_since_latest_version(self):
-        pull_request_numbers = []
+        return [
+            pull_request_number
+            for _, pull_request_number in self.merged_pull_requests_since_latest_version
+        ]
+
+    @property
+    def merged_pull_requests_since_latest_version(self):
+        """The merge commit and number of each pull request since the latest version"""
+        merged_pull_requests = []
 
         for commit_msg in self.merges_since(self.latest_version):
 
             if matches := GITHUB_MERGED_PULL_REQUEST.findall(commit_msg):
-                _, pull_request_number = matches[0]
-                pull_request_numbers.append(pull_request_number)
+                merged_pull_requests.append(matches[0])
 
-        return pull_request_numbers
+        return merged_pull_requests
 
-    def create_release(self, release):
-        return self.api.create_release(release)
+    def create_release(self, release, uploads=None, draft=False):
+        return self.api.create_release(release, uploads=uploads, draft=draft)
+
+    def publish_release(self, release_response):
+        return self.api.publish_release(release_response)
+
+    def delete_release(self, release_response):
+        return self.api.delete_release(release_response)
+
+
+@attr.s
+class ConventionalCommitRepository(GitHubRepository):
+    """
+    A GitHub repository whose unreleased changes are its Conventional Commits,
+    so that releases are derived from git alone and the GitHub API is only
+    used to publish them.
+    """
+
+    @property
+    def labels(self):
+        return [
+            {'name': commit_type, 'description': description}
+            for commit_type, description in CONVENTIONAL_COMMIT_LABELS.items()
+        ]
+
+    @property
+    def pull_requests_since_latest_version(self):
+        return [
+            commit
+            for commit in (
+                ConventionalCommit.from_log(*fields)
+                for fields in self.commits_since(self.latest_version)
+            )
+            if commit
+        ]
 
 
 @attr.s
@@ -199,3 +528,51 @@ class PullRequest(object):
     @classmethod
     def from_number(cls, number):
         pass
+
+    @classmethod
+    def from_note(cls, note):
+        return cls(**json.loads(note))
+
+    def to_note(self):
+        return json.dumps(attr.asdict(self), sort_keys=True)
+
+
+# commit types, and the release notes section that lists them
+CONVENTIONAL_COMMIT_LABELS = {
+    BREAKING_CHANGE_LABEL: 'Breaking Changes',
+    'feat': 'Features',
+    'fix': 'Bug Fixes',
+    'perf': 'Performance Improvements',
+}
+
+
+@attr.s
+class ConventionalCommit(object):
+    """A commit, in place of a pull request, labelled with its commit type"""
+
+    number = attr.ib()
+    title = attr.ib()
+    description = attr.ib()
+    author = attr.ib()
+    commit_type = attr.ib()
+    scope = attr.ib(default=None)
+    breaking = attr.ib(default=False)
+
+    @property
+    def label_names(self):
+        return [self.commit_type] + ([BREAKING_CHANGE_LABEL] if self.breaking else [])
+
+    @classmethod
+    def from_log(cls, sha, author, subject, body=''):
+        """The commit, or `None` when its subject isn't a Conventional Commit"""
+        if not (match := CONVENTIONAL_COMMIT.match(subject)):
+            return None
+        return cls(
+            number=sha,
+            title=subject,
+            description=body.strip(),
+            author=author,
+            commit_type=match.group('type').lower(),
+            scope=match.group('scope'),
+            breaking=bool(match.group('breaking')),
+        )
@@ -1,44 +1,237 @@
+import hashlib
 import logging
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from shutil import rmtree
 
-from changes import shell, util, venv, verification
+import attr
+from plumbum.commands import ProcessExecutionError
+
+from changes import (
+    artifact_cache,
+    executables,
+    shell,
+    tracing,
+    util,
+    venv,
+    verification,
+)
 
 log = logging.getLogger(__name__)
 
+DIST_DIRECTORY = 'dist'
+SDIST = 'sdist'
+WHEEL = 'wheel'
+# the interpreter running changes, which has the `build` frontend installed
+DEFAULT_INTERPRETER = sys.executable
+# not needed (or actively harmful to share) in a per-build source copy
+SOURCE_COPY_IGNORES = shutil.ignore_patterns(
+    '.git',
+    DIST_DIRECTORY,
+    'build',
+    '.tox',
+    '.nox',
+    '*.egg-info',
+    '__pycache__',
+    '.pytest_cache',
+    'venv',
+    '.venv',
+    'node_modules',
+)
+
+
+@attr.s
+class Artifact(object):
+    """A built distribution, as recorded in a build manifest"""
+
+    path = attr.ib(converter=Path)
+    kind = attr.ib()
+    interpreter = attr.ib(default=DEFAULT_INTERPRETER)
+    sha256 = attr.ib(default=None)
+    size = attr.ib(default=None)
+
+    @classmethod
+    def from_path(cls, path, kind, interpreter=DEFAULT_INTERPRETER):
+        path = Path(path)
+        return cls(
+            path=path,
+            kind=kind,
+            interpreter=interpreter,
+            sha256=hashlib.sha256(path.read_bytes()).hexdigest(),
+            size=path.stat().st_size,
+        )
+
+    @property
+    def name(self):
+        return self.path.name
+
+    def move_to(self, directory):
+        destination = Path(directory).joinpath(self.name)
+        os.replace(self.path, destination)
+        return attr.evolve(self, path=destination)
+
+
+def build_targets(context):
+    """An sdist plus one wheel per target interpreter"""
+    interpreters = context.build_interpreters or [DEFAULT_INTERPRETER]
+    return [(SDIST, interpreters[0])] + [
+        (WHEEL, interpreter) for interpreter in interpreters
+    ]
+
+
+def unique_artifacts(artifacts):
+    """
+    The first artifact with each file name, since every interpreter builds
+    the same `py3-none-any` wheel of a pure python project.
+    """
+    unique = {}
+    for artifact in artifacts:
+        unique.setdefault(artifact.name, artifact)
+    return list(unique.values())
+
+
+def copy_source_tree(destination):
+    """
+    Copies the project so concurrent builds don't share `build/` or
+    `*.egg-info`, with a gitfile pointing at the real repository for
+    backends that derive versions from git.
+    """
+    shutil.copytree(os.curdir, destination, ignore=SOURCE_COPY_IGNORES)
+    if os.path.isdir('.git'):
+        Path(destination).joinpath('.git').write_text(
+            f"gitdir: {os.path.abspath('.git')}\n"
+        )
+    return destination
+
+
+def run_build(kind, interpreter, build_directory):
+    """Builds one distribution with the PEP 517 `build` frontend"""
+    source_directory = copy_source_tree(Path(build_directory).joinpath('src'))
+    output_directory = Path(build_directory).joinpath('out')
+
+    with tracing.span(f'build {kind}', 'build', interpreter=interpreter):
+        try:
+            executables.command(interpreter)(
+                '-m',
+                'build',
+                f'--{kind}',
+                '--outdir',
+                str(output_directory),
+                str(source_directory),
+            )
+        except ProcessExecutionError as e:
+            if 'No module named build' not in e.stderr:
+                raise
+            raise Exception(
+                f'{interpreter} has no build frontend, '
+                f'install it with `{interpreter} -m pip install build`'
+            )
+
+    return [
+        Artifact.from_path(path, kind, interpreter)
+        for path in sorted(output_directory.iterdir())
+    ]
+
 
 def build_distributions(context):
-    """Builds package distributions"""
-    rmtree('dist', ignore_errors=True)
+    """
+    Builds the sdist and wheels concurrently, returning their manifest.
 
-    build_package_command = 'python setup.py clean sdist bdist_wheel'
-    result = shell.dry_run(build_package_command, context.dry_run)
-    packages = "nothing" if context.dry_run else Path('dist').files()
+    Builds are cached by working tree hash and build configuration, so
+    rebuilding an unchanged tree reuses the cached artifacts.
+    """
+    if context.dry_run:
+        log.info('Dry run, skipping build')
+        return []
+
+    targets = build_targets(context)
+    cache = artifact_cache.ArtifactCache()
+    build_key = artifact_cache.build_key(targets)
+    if build_key and (manifest := cache.get(build_key, Artifact, DIST_DIRECTORY)):
+        log.info(f"Reusing {', '.join(artifact.name for artifact in manifest)}")
+        return manifest
+
+    artifacts = []
+    failures = []
+    with util.mktmpdir() as tmp_dir, ThreadPoolExecutor(
+        max_workers=len(targets)
+    ) as executor:
+        builds = [
+            (
+                kind,
+                interpreter,
+                executor.submit(
+                    run_build,
+                    kind,
+                    interpreter,
+                    Path(tmp_dir).joinpath(f'{index}-{kind}'),
+                ),
+            )
+            for index, (kind, interpreter) in enumerate(targets)
+        ]
+
+        for kind, interpreter, build in builds:
+            try:
+                artifacts.extend(build.result())
+            except Exception as e:
+                failures.append(f'{kind} ({interpreter}): {e}')
+
+        if failures:
+            raise Exception(f"Error building packages: {'; '.join(failures)}")
+
+        dist_directory = Path(DIST_DIRECTORY)
+        dist_directory.mkdir(exist_ok=True)
+        manifest = [
+            artifact.move_to(dist_directory) for artifact in unique_artifacts(artifacts)
+        ]
+
+    if build_key:
+        cache.put(build_key, manifest)
+
+    log.info(f"Built {', '.join(artifact.name for artifact in manifest)}")
+    return manifest
 
-    if not result:
-        raise Exception(f'Error building packages: {result}')
-    else:
-        log.info(f"Built {', '.join(packages)}")
-    return packages
+
+def verify_distribution(context, distribution):
+    """Installs `distribution` into its own environment and runs the test command"""
+    with venv.verification_venv(distribution.interpreter) as venv_dir:
+        venv.install(str(distribution.path.resolve()), venv_dir)
+        if context.test_command:
+            verification.run_test_command(context, venv_dir)
 
 
 # tox
 def install_package(context):
-    """Attempts to install the sdist and wheel."""
-
-    if not context.dry_run and build_distributions(context):
-        with util.mktmpdir() as tmp_dir:
-            venv.create_venv(tmp_dir=tmp_dir)
-            for distribution in Path('dist').files():
-                try:
-                    venv.install(distribution, tmp_dir)
-                    log.info('Successfully installed %s', distribution)
-                    if context.test_command and verification.run_test_command(context):
-                        log.info(
-                            'Successfully ran test command: %s', context.test_command
-                        )
-                except Exception as e:
-                    raise Exception(f'Error installing distribution {distribution}', e)
+    """
+    Attempts to install each built distribution, concurrently and each in an
+    isolated environment, so that one distribution can't mask another.
+    """
+
+    if not context.dry_run and (distributions := build_distributions(context)):
+        with ThreadPoolExecutor(max_workers=len(distributions)) as executor:
+            verifications = [
+                (
+                    distribution,
+                    executor.submit(verify_distribution, context, distribution),
+                )
+                for distribution in distributions
+            ]
+
+        failures = []
+        for distribution, verification_result in verifications:
+            try:
+                verification_result.result()
+                log.info('Successfully installed %s', distribution.name)
+            except Exception as e:
+                log.error('Error installing %s: %s', distribution.name, e)
+                failures.append(f'{distribution.name}: {e}')
+
+        if failures:
+            raise Exception(f"Error installing distributions: {'; '.join(failures)}")
+        if context.test_command:
+            log.info('Successfully ran test command: %s', context.test_command)
     else:
         log.info('Dry run, skipping installation')
 
@@ -47,8 +240,11 @@ def install_package(context):
 def upload_package(context):
     """Uploads your project packages to pypi with twine."""
 
-    if not context.dry_run and build_distributions(context):
-        upload_args = 'twine upload ' + ' '.join(Path('dist').files())
+    if not context.dry_run and (distributions := build_distributions(context)):
+        # already uploaded files are skipped, so a failed upload can be resumed
+        upload_args = 'twine upload --skip-existing ' + ' '.join(
+            str(distribution.path) for distribution in distributions
+        )
         if context.pypi:
             upload_args += f' -r {context.pypi}'
 
@@ -66,26 +262,28 @@ def upload_package(context):
 def install_from_pypi(context):
     """Attempts to install your package from pypi."""
 
-    tmp_dir = venv.create_venv()
-    install_cmd = f'{tmp_dir}/bin/pip install {context.module_name}'
+    with venv.verification_venv() as tmp_dir:
+        install_cmd = f'{tmp_dir}/bin/pip install {context.module_name}'
 
-    package_index = 'pypi'
-    if context.pypi:
-        install_cmd += f'-i {context.pypi}'
-        package_index = context.pypi
+        package_index = 'pypi'
+        if context.pypi:
+            install_cmd += f'-i {context.pypi}'
+            package_index = context.pypi
 
-    try:
-        result = shell.dry_run(install_cmd, context.dry_run)
-        if not context.dry_run and not result:
-            log.error(
-                'Failed to install %s from %s', context.module_name, package_index
-            )
-        else:
-            log.info(
-                'Successfully installed %s from %s', context.module_name, package_index
-            )
+        try:
+            result = shell.dry_run(install_cmd, context.dry_run)
+            if not context.dry_run and not result:
+                log.error(
+                    'Failed to install %s from %s', context.module_name, package_index
+                )
+            else:
+                log.info(
+                    'Successfully installed %s from %s',
+                    context.module_name,
+                    package_index,
+                )
 
-    except Exception as e:
-        error_msg = f'Error installing {context.module_name} from {package_index}'
-        log.exception(error_msg)
-        raise Exception(error_msg, e)
+        except Exception as e:
+            error_msg = f'Error installing {context.module_name} from {package_index}'
+            log.exception(error_msg)
+            raise Exception(error_msg, e)
@@ -1,14 +1,18 @@
+import json
 import logging
-from os.path import exists
+import os
+from concurrent.futures import ThreadPoolExecutor
+from os.path import abspath, exists, expanduser
 
-from plumbum import local
+import attr
 from plumbum.cmd import git
-from plumbum.commands import CommandNotFound
 
-from changes import attributes, exceptions
+from changes import attributes, exceptions, executables, metrics, util
 
 log = logging.getLogger(__name__)
 
+PROBE_CACHE_FILE = 'probes.json'
+
 
 TOOLS = ['git', 'diff', 'python']
 
@@ -44,12 +48,10 @@ def has_setup():
 
 
 def has_binary(command):
-    try:
-        local.which(command)
+    if executables.which(command):
         return True
-    except CommandNotFound:
-        log.info(f'{command} does not exist')
-        return False
+    log.info(f'{command} does not exist')
+    return False
 
 
 def has_tools():
@@ -87,25 +89,161 @@ def has_metadata(python_module):
     return report_and_raise(
         'Has module metadata',
         has_metadata,
-        'Your %s/__init__.py must contain __version__ and __url__ attributes',
+        f'Your {python_module}/__init__.py must contain __version__ and __url__ '
+        'attributes',
     )
 
 
 def has_signing_key(context):
+    probe_cache = ProbeCache.load()
+    try:
+        return probe_cache.run(
+            'has_signing_key', git_config_paths(), lambda: _has_signing_key(context)
+        )
+    finally:
+        probe_cache.save()
+
+
+def _has_signing_key(context):
     return 'signingkey' in git('config', '-l')
 
 
+def path_directories():
+    """The `PATH` entries, whose mtimes change as executables come and go"""
+    return [
+        directory
+        for directory in os.environ.get('PATH', '').split(os.pathsep)
+        if directory
+    ]
+
+
+def git_config_paths():
+    return [
+        '.git/config',
+        expanduser('~/.gitconfig'),
+        os.path.join(
+            os.environ.get('XDG_CONFIG_HOME') or expanduser('~/.config'), 'git/config'
+        ),
+    ]
+
+
+def fingerprint(paths):
+    """The modification times of `paths`, `None` for missing ones"""
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+@attr.s
+class ProbeCache(object):
+    """
+    Probe outcomes for the current project, each keyed by the mtimes of
+    the files (or `PATH` directories) that the probe checked.
+    """
+
+    path = attr.ib()
+    project = attr.ib()
+    entries = attr.ib(default=attr.Factory(dict))
+
+    @classmethod
+    def load(cls):
+        cache_path = util.cache_directory().joinpath(PROBE_CACHE_FILE)
+        project = abspath(os.curdir)
+        entries = {}
+        if cache_path.exists():
+            try:
+                entries = json.loads(cache_path.read_text()).get(project, {})
+            except ValueError:
+                log.info(f'Ignoring unreadable probe cache {cache_path}')
+        return cls(path=cache_path, project=project, entries=entries)
+
+    def save(self):
+        projects = {}
+        if self.path.exists():
+            try:
+                projects = json.loads(self.path.read_text())
+            except ValueError:
+                pass
+        projects[self.project] = self.entries
+
+        tmp_path = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(json.dumps(projects, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+    def run(self, probe_name, paths, probe):
+        """Replays a cached outcome or runs (and records) the probe"""
+        current_fingerprint = fingerprint(paths)
+        entry = self.entries.get(probe_name)
+        cache_hit = bool(entry) and entry['fingerprint'] == current_fingerprint
+        metrics.cache_lookup('probe', cache_hit)
+
+        if not cache_hit:
+            try:
+                entry = {'result': probe()}
+            except exceptions.ProbeException as e:
+                entry = {'error': str(e)}
+            entry['fingerprint'] = current_fingerprint
+            self.entries[probe_name] = entry
+
+        if 'error' in entry:
+            raise exceptions.ProbeException(entry['error'])
+        return entry['result']
+
+
+def project_probes(python_module):
+    """The independent probes, with the paths their outcome depends on"""
+    return [
+        ('has_tools', path_directories(), has_tools, 'Install git, diff or python'),
+        ('has_setup', ['setup.py'], has_setup, None),
+        (
+            f'has_metadata:{python_module}',
+            [f'{python_module}/__init__.py'],
+            lambda: has_metadata(python_module),
+            None,
+        ),
+        (
+            'has_test_runner',
+            path_directories(),
+            has_test_runner,
+            f"Install a test runner ({', '.join(TEST_RUNNERS)})",
+        ),
+        ('has_readme', [f'README{ext}' for ext in README_EXTENSIONS], has_readme, None),
+        ('has_changelog', ['CHANGELOG.md'], has_changelog, None),
+    ]
+
+
 def probe_project(python_module):
     """
     Check if the project meets `changes` requirements.
-    Complain and exit otherwise.
+    Complain about every unmet requirement and exit otherwise.
     """
     log.info('Checking project for changes requirements.')
-    return (
-        has_tools()
-        and has_setup()
-        and has_metadata(python_module)
-        and has_test_runner()
-        and has_readme()
-        and has_changelog()
-    )
+    probe_cache = ProbeCache.load()
+    probes = project_probes(python_module)
+
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        outcomes = [
+            (
+                executor.submit(probe_cache.run, probe_name, paths, probe),
+                failure_message,
+            )
+            for probe_name, paths, probe, failure_message in probes
+        ]
+
+    failures = []
+    for outcome, failure_message in outcomes:
+        try:
+            if not outcome.result():
+                failures.append(failure_message)
+        except exceptions.ProbeException as e:
+            failures.append(str(e))
+
+    probe_cache.save()
+
+    if failures:
+        raise exceptions.ProbeException('\n'.join(failures))
+    return True
@@ -0,0 +1,167 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import attr
+
+from changes import metrics, tracing
+
+log = logging.getLogger(__name__)
+
+
+@attr.s
+class Step(object):
+    """A unit of pipeline work, run once all its `dependencies` have completed"""
+
+    name = attr.ib()
+    function = attr.ib(repr=False)
+    dependencies = attr.ib(default=attr.Factory(list))
+
+
+@attr.s
+class StepTiming(object):
+    start = attr.ib()
+    end = attr.ib()
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+@attr.s
+class Pipeline(object):
+    """
+    A dependency DAG of steps, run on a worker pool so that independent
+    steps overlap.
+
+    With a `checkpoint`, each completed step's output is recorded, and steps
+    the checkpoint has already completed are skipped.
+    """
+
+    steps = attr.ib()
+    max_workers = attr.ib(default=None)
+    checkpoint = attr.ib(default=None)
+    results = attr.ib(default=attr.Factory(dict), init=False, repr=False)
+    timings = attr.ib(default=attr.Factory(dict), init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self.steps = {step.name: step for step in self.steps}
+        for step in self.steps.values():
+            unknown = set(step.dependencies) - set(self.steps)
+            if unknown:
+                raise ValueError(f'{step.name} depends on unknown steps {unknown}')
+        self.topological_order()
+
+    def topological_order(self):
+        """The step names, dependencies first, raising `ValueError` on a cycle"""
+        order = []
+        visiting = set()
+
+        def visit(name):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f'Dependency cycle through {name}')
+            visiting.add(name)
+            for dependency in self.steps[name].dependencies:
+                visit(dependency)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.steps:
+            visit(name)
+        return order
+
+    def run_step(self, step):
+        start = time.perf_counter()
+        try:
+            with tracing.span(step.name, 'step'), metrics.timer(
+                'changes_step_seconds', step=step.name
+            ):
+                return step.function()
+        finally:
+            self.timings[step.name] = StepTiming(start, time.perf_counter())
+
+    def complete(self, done, running):
+        """
+        Records the results of the `done` futures, returning the name and
+        exception of each failed step
+        """
+        failures = []
+        for future in done:
+            name = running.pop(future)
+            try:
+                self.results[name] = future.result()
+            except Exception as e:
+                failures.append((name, e))
+                continue
+            if self.checkpoint:
+                self.checkpoint.record(name, self.results[name])
+        return failures
+
+    def run(self):
+        """
+        Runs every step once its dependencies have completed, returning their
+        results by step name.
+
+        On the first failure no further steps are started, the running ones
+        are waited for (and checkpointed if they succeed), and the failure is
+        raised.
+        """
+        pending = dict(self.steps)
+        running = {}
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers or len(self.steps) or 1
+        ) as executor:
+            while pending or running:
+                for name, step in list(pending.items()):
+                    if self.checkpoint and self.checkpoint.is_complete(name):
+                        log.info(f'{name} already completed, skipping')
+                        self.results[name] = self.checkpoint.output(name)
+                        del pending[name]
+                    elif all(
+                        dependency in self.results for dependency in step.dependencies
+                    ):
+                        running[executor.submit(self.run_step, step)] = name
+                        del pending[name]
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                failures = self.complete(done, running)
+                if failures:
+                    log.error(f'{failures[0][0]} failed, waiting for running steps')
+                    finished, _ = wait(running)
+                    # steps that succeed meanwhile are checkpointed, not rerun
+                    self.complete(finished, running)
+                    raise failures[0][1]
+        return self.results
+
+    def critical_path(self):
+        """
+        The chain of completed steps that determined the pipeline's duration:
+        from the last step to finish, back through the dependency each step
+        waited on longest.
+        """
+        if not self.timings:
+            return []
+
+        path = [max(self.timings, key=lambda name: self.timings[name].end)]
+        while dependencies := [
+            dependency
+            for dependency in self.steps[path[-1]].dependencies
+            if dependency in self.timings
+        ]:
+            path.append(max(dependencies, key=lambda name: self.timings[name].end))
+        return list(reversed(path))
+
+    def critical_path_report(self):
+        path = self.critical_path()
+        if not path:
+            return 'No steps completed'
+        total = self.timings[path[-1]].end - min(
+            timing.start for timing in self.timings.values()
+        )
+        return f'Critical path ({total:.2f}s): ' + ' -> '.join(
+            f'{name} ({self.timings[name].duration:.2f}s)' for name in path
+        )
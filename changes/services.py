@@ -1,9 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import attr
 import requests
 import uritemplate
 
+from changes import metrics, tracing
+
 EXT_TO_MIME_TYPE = {
     '.gz': 'application/x-gzip',
     '.whl': 'application/zip',
@@ -36,51 +39,87 @@ class GitHub(object):
         # TODO: requests.Session
         return {'Authorization': f'token {self.auth_token}'}
 
+    def request(self, method, url, headers=None, **kwargs):
+        with metrics.timer('changes_http_request_seconds', method=method):
+            response = requests.request(
+                method, url, headers=headers or self.headers, **kwargs
+            )
+
+        metrics.inc('changes_http_requests', method=method, status=response.status_code)
+        # set on responses served through requests-cache
+        if hasattr(response, 'from_cache'):
+            metrics.cache_lookup('http', response.from_cache)
+
+        return response
+
+    @tracing.traced('github.pull_request', 'http')
     def pull_request(self, pr_num):
         pull_request_api_url = uritemplate.expand(
             self.ISSUE_ENDPOINT, dict(owner=self.owner, repo=self.repo, number=pr_num)
         )
 
-        return requests.get(pull_request_api_url, headers=self.headers).json()
+        return self.request('GET', pull_request_api_url).json()
 
+    @tracing.traced('github.labels', 'http')
     def labels(self):
         labels_api_url = uritemplate.expand(
             self.LABELS_ENDPOINT, dict(owner=self.owner, repo=self.repo)
         )
 
-        return requests.get(labels_api_url, headers=self.headers).json()
+        return self.request('GET', labels_api_url).json()
 
-    def create_release(self, release, uploads=None):
+    @tracing.traced('github.create_release', 'http')
+    def create_release(self, release, uploads=None, draft=False):
         params = {
             'tag_name': release.version,
             'name': release.name,
             'body': release.description,
             # 'prerelease': True,
+            'draft': draft,
         }
 
         releases_api_url = uritemplate.expand(
             self.RELEASES_ENDPOINT, dict(owner=self.owner, repo=self.repo)
         )
 
-        response = requests.post(
-            releases_api_url, headers=self.headers, json=params
-        ).json()
+        response = self.request('POST', releases_api_url, json=params).json()
 
         upload_url = response['upload_url']
-        upload_responses = (
-            [self.create_upload(upload_url, Path(upload)) for upload in uploads]
-            if uploads
-            else []
-        )
+        upload_responses = []
+        if uploads:
+            with ThreadPoolExecutor(max_workers=len(uploads)) as executor:
+                upload_responses = list(
+                    executor.map(
+                        lambda upload: self.create_upload(upload_url, Path(upload)),
+                        uploads,
+                    )
+                )
 
         return response, upload_responses
 
+    @tracing.traced('github.publish_release', 'http')
+    def publish_release(self, release_response):
+        """Publishes a draft release, once its tag is on GitHub"""
+        return self.request(
+            'PATCH', release_response['url'], json={'draft': False}
+        ).json()
+
+    @tracing.traced('github.delete_release', 'http')
+    def delete_release(self, release_response):
+        return self.request('DELETE', release_response['url'])
+
+    @tracing.traced('github.create_upload', 'http')
     def create_upload(self, upload_url, upload_path):
-        requests.post(
+        upload_content = upload_path.read_bytes()
+        response = self.request(
+            'POST',
             uritemplate.expand(upload_url, {'name': upload_path.name}),
             headers=dict(
-                **self.headers, **{'content-type': EXT_TO_MIME_TYPE[upload_path.ext]}
+                **self.headers,
+                **{'content-type': EXT_TO_MIME_TYPE[upload_path.suffix]},
             ),
-            data=upload_path.read_bytes(),
+            data=upload_content,
             verify=False,
         )
+        metrics.inc('changes_uploaded_bytes', len(upload_content))
+        return response
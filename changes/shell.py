@@ -1,6 +1,6 @@
 import logging
 
-from plumbum import local
+from changes import executables, tracing
 
 log = logging.getLogger(__name__)
 
@@ -10,7 +10,8 @@ def dry_run(command, dry_run):
     if not dry_run:
         cmd_parts = command.split(' ')
         # http://plumbum.readthedocs.org/en/latest/local_commands.html#run-and-popen
-        return local[cmd_parts[0]](cmd_parts[1:])
+        with tracing.span(f'shell {cmd_parts[0]}', 'shell', command=command):
+            return executables.command(cmd_parts[0])(cmd_parts[1:])
     else:
         log.info(f'Dry run of {command}, skipping')
     return True
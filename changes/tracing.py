@@ -0,0 +1,145 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import attr
+
+DEFAULT_CATEGORY = 'changes'
+SUMMARY_TOP = 10
+
+
+@attr.s
+class Span(object):
+    name = attr.ib()
+    category = attr.ib()
+    start = attr.ib()
+    thread_id = attr.ib()
+    depth = attr.ib()
+    args = attr.ib(default=attr.Factory(dict))
+    duration = attr.ib(default=0.0)
+    children_duration = attr.ib(default=0.0)
+
+    @property
+    def self_duration(self):
+        return self.duration - self.children_duration
+
+
+@attr.s
+class Tracer(object):
+    """Records nested timing spans, a no-op unless enabled"""
+
+    enabled = attr.ib(default=False)
+    spans = attr.ib(default=attr.Factory(list), repr=False)
+    origin = attr.ib(default=attr.Factory(time.perf_counter), repr=False)
+    _lock = attr.ib(default=attr.Factory(threading.Lock), repr=False)
+    _local = attr.ib(default=attr.Factory(threading.local), repr=False)
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+        self.spans = []
+
+    @property
+    def stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, category=DEFAULT_CATEGORY, **args):
+        if not self.enabled:
+            yield None
+            return
+
+        stack = self.stack
+        span = Span(
+            name=name,
+            category=category,
+            start=time.perf_counter(),
+            thread_id=threading.get_ident(),
+            depth=len(stack),
+            args=args,
+        )
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            stack.pop()
+            if stack:
+                stack[-1].children_duration += span.duration
+            with self._lock:
+                self.spans.append(span)
+
+    def trace_events(self):
+        """Spans as Chrome trace-event "complete" events"""
+        process_id = os.getpid()
+        return [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round((span.start - self.origin) * 1e6, 3),
+                'dur': round(span.duration * 1e6, 3),
+                'pid': process_id,
+                'tid': span.thread_id,
+                'args': {key: str(value) for key, value in span.args.items()},
+            }
+            for span in sorted(self.spans, key=lambda span: span.start)
+        ]
+
+    def write_chrome_trace(self, trace_path):
+        Path(trace_path).write_text(
+            json.dumps({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'})
+        )
+
+    def summary(self, top=SUMMARY_TOP):
+        """The `top` span names ranked by self time"""
+        totals = defaultdict(lambda: {'calls': 0, 'total': 0.0, 'self': 0.0})
+        for span in self.spans:
+            total = totals[span.name]
+            total['calls'] += 1
+            total['total'] += span.duration
+            total['self'] += span.self_duration
+
+        return sorted(
+            ((name, total) for name, total in totals.items()),
+            key=lambda item: item[1]['self'],
+            reverse=True,
+        )[:top]
+
+    def summary_lines(self, top=SUMMARY_TOP):
+        lines = [f"{'self ms':>10} {'total ms':>10} {'calls':>6}  name"]
+        lines.extend(
+            f"{total['self'] * 1000:>10.1f} {total['total'] * 1000:>10.1f} "
+            f"{total['calls']:>6}  {name}"
+            for name, total in self.summary(top)
+        )
+        return lines
+
+
+tracer = Tracer()
+
+
+def span(name, category=DEFAULT_CATEGORY, **args):
+    """Times the enclosed block as a (possibly nested) span"""
+    return tracer.span(name, category, **args)
+
+
+def traced(name, category=DEFAULT_CATEGORY):
+    """Decorates a function to time each call as a span"""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
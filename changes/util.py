@@ -1,7 +1,14 @@
 import contextlib
+import os
 import tempfile
+from os.path import expanduser, expandvars
+from pathlib import Path
 from shutil import rmtree
 
+from changes import compat
+
+CACHE_DIRECTORY_ENVVAR = 'CHANGES_CACHE_DIR'
+
 
 def extract(dictionary, keys):
     """
@@ -32,3 +39,22 @@ def mktmpdir():
         yield tmp_dir
     finally:
         rmtree(tmp_dir)
+
+
+def cache_directory(*parts):
+    """
+    The (created) directory where changes keeps its caches
+
+    :param parts: optional sub-directories of the cache directory
+    :return Path: the cache directory
+    """
+    cache_root = os.environ.get(CACHE_DIRECTORY_ENVVAR) or (
+        expandvars(r'%LOCALAPPDATA%\\changes\\cache')
+        if compat.IS_WINDOWS
+        else os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or expanduser('~/.cache'), 'changes'
+        )
+    )
+    directory = Path(cache_root).joinpath(*parts)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
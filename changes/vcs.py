@@ -3,6 +3,7 @@ import logging
 
 import click
 import requests
+from plumbum.cmd import git
 from uritemplate import expand
 
 from changes import probe, shell
@@ -19,21 +20,44 @@ EXT_TO_MIME_TYPE = {
 }
 
 
+def has_changes(paths):
+    return bool(git('status', '--porcelain', '--', *paths).strip())
+
+
+def has_tag(version):
+    return bool(git('tag', '--list', version).strip())
+
+
 def commit_version_change(context):
+    """
+    Commits and pushes the version change, only pushing when a resumed
+    release already committed it.
+    """
     # TODO: signed commits?
-    shell.dry_run(
-        COMMIT_TEMPLATE % (context.new_version, context.module_name), context.dry_run
-    )
+    version_change = [f'{context.module_name}/__init__.py', 'CHANGELOG.md']
+    if context.dry_run or has_changes(version_change):
+        shell.dry_run(
+            COMMIT_TEMPLATE % (context.new_version, context.module_name),
+            context.dry_run,
+        )
+    else:
+        log.info(f'{context.new_version} is already committed')
     shell.dry_run('git push', context.dry_run)
 
 
 def tag_and_push(context):
-    """Tags your git repo with the new version number"""
-    tag_option = '--sign' if probe.has_signing_key(context) else '--annotate'
-    shell.dry_run(
-        TAG_TEMPLATE % (tag_option, context.new_version, context.new_version),
-        context.dry_run,
-    )
+    """
+    Tags your git repo with the new version number, only pushing when a
+    resumed release already tagged it.
+    """
+    if context.dry_run or not has_tag(context.new_version):
+        tag_option = '--sign' if probe.has_signing_key(context) else '--annotate'
+        shell.dry_run(
+            TAG_TEMPLATE % (tag_option, context.new_version, context.new_version),
+            context.dry_run,
+        )
+    else:
+        log.info(f'{context.new_version} is already tagged')
 
     shell.dry_run('git push --tags', context.dry_run)
 
@@ -69,8 +93,8 @@ def upload_release_distributions(context, gh_token, distributions, upload_url):
         response = requests.post(
             expand(upload_url, dict(name=distribution.name)),
             auth=(gh_token, 'x-oauth-basic'),
-            headers={'content-type': EXT_TO_MIME_TYPE[distribution.ext]},
-            data=io.open(distribution, mode='rb'),
+            headers={'content-type': EXT_TO_MIME_TYPE[distribution.path.suffix]},
+            data=io.open(distribution.path, mode='rb'),
             verify=False,
         )
         click.echo('Upload response: {response}'.format(response=response))
@@ -1,19 +1,181 @@
+import contextlib
+import hashlib
+import json
+import logging
 import os
+import shutil
 import tempfile
+import threading
+import time
+from pathlib import Path
 
-from plumbum import local
-from plumbum.cmd import virtualenv
+from changes import compat, executables, metrics, tracing, util
 
+log = logging.getLogger(__name__)
 
-def create_venv(tmp_dir=None):
+VENV_POOL_DIRECTORY = 'venvs'
+BIN_DIRECTORY = 'Scripts' if compat.IS_WINDOWS else 'bin'
+DEFAULT_INTERPRETER = 'python'
+# base environments unused for this long are pruned from the pool
+MAX_BASE_VENV_AGE = 14 * 24 * 60 * 60
+# marks a complete base environment, records the path it was built at (which
+# its scripts embed) and, by its mtime, when it was last cloned
+BASE_VENV_MARKER = '.changes-base-venv'
+
+_pool_lock = threading.Lock()
+
+
+def base_venv_key(interpreter, requirements):
+    interpreter_path = executables.which(interpreter)
+    identity = {
+        'interpreter': str(interpreter_path or interpreter),
+        'interpreter_mtime': (
+            interpreter_path.stat().st_mtime_ns if interpreter_path else None
+        ),
+        'requirements': sorted(requirements),
+    }
+    return hashlib.sha256(json.dumps(identity).encode('utf-8')).hexdigest()[:16]
+
+
+def build_base_venv(venv_dir, interpreter, requirements):
+    with tracing.span('virtualenv', 'venv', interpreter=interpreter):
+        executables.command('virtualenv')('--python', interpreter, str(venv_dir))
+        if requirements:
+            executables.command(str(Path(venv_dir, BIN_DIRECTORY, 'pip')))(
+                'install', *requirements
+            )
+
+
+def base_venv(interpreter=DEFAULT_INTERPRETER, requirements=()):
+    """
+    The pooled base environment for `interpreter` and the bootstrap
+    `requirements`, built on first use.
+    """
+    pool_directory = util.cache_directory(VENV_POOL_DIRECTORY)
+    venv_dir = pool_directory.joinpath(base_venv_key(interpreter, requirements))
+    marker_path = venv_dir.joinpath(BASE_VENV_MARKER)
+
+    with _pool_lock:
+        pool_hit = marker_path.exists()
+        metrics.cache_lookup('venv', pool_hit)
+
+        if not pool_hit:
+            staging_dir = pool_directory.joinpath(f'.{venv_dir.name}.{os.getpid()}')
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            build_base_venv(staging_dir, interpreter, requirements)
+            staging_dir.joinpath(BASE_VENV_MARKER).write_text(str(staging_dir))
+            try:
+                os.replace(staging_dir, venv_dir)
+            except OSError:
+                # another process completed the same base environment first
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            prune_pool(pool_directory)
+
+        marker_path.touch()
+    return venv_dir
+
+
+def prune_pool(pool_directory=None, max_age=MAX_BASE_VENV_AGE):
+    """Removes base environments that haven't been cloned for `max_age` seconds"""
+    pool_directory = pool_directory or util.cache_directory(VENV_POOL_DIRECTORY)
+    oldest_allowed = time.time() - max_age
+    for venv_dir in pool_directory.iterdir():
+        marker_path = venv_dir.joinpath(BASE_VENV_MARKER)
+        if venv_dir.name.startswith('.'):
+            continue
+        if not marker_path.exists() or marker_path.stat().st_mtime < oldest_allowed:
+            log.info(f'Pruning base environment {venv_dir}')
+            shutil.rmtree(venv_dir, ignore_errors=True)
+
+
+def clone_file(source, destination, build_path, venv_dir):
+    """
+    Hardlinks `source` (copying across devices), except for scripts that
+    embed the base environment's build path, which are copied and rewritten.
+    """
+    if source.parent.name == BIN_DIRECTORY or source.name == 'pyvenv.cfg':
+        content = source.read_bytes()
+        if build_path in content:
+            destination.write_bytes(
+                content.replace(build_path, os.fsencode(str(venv_dir)))
+            )
+            shutil.copymode(source, destination)
+            return
+
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def clone_venv(base_dir, venv_dir):
+    """Clones the base environment into `venv_dir`, relocating its scripts"""
+    base_dir, venv_dir = Path(base_dir), Path(venv_dir)
+    build_path = os.fsencode(base_dir.joinpath(BASE_VENV_MARKER).read_text())
+    with tracing.span('clone venv', 'venv'):
+        for directory, directory_names, file_names in os.walk(base_dir):
+            source_directory = Path(directory)
+            destination_directory = venv_dir.joinpath(
+                source_directory.relative_to(base_dir)
+            )
+            destination_directory.mkdir(parents=True, exist_ok=True)
+
+            for name in directory_names + file_names:
+                source = source_directory.joinpath(name)
+                destination = destination_directory.joinpath(name)
+                if source.is_symlink():
+                    link_target = os.readlink(source)
+                    for relocated_path in (base_dir, Path(os.fsdecode(build_path))):
+                        try:
+                            link_target = venv_dir.joinpath(
+                                Path(link_target).relative_to(relocated_path)
+                            )
+                            break
+                        except ValueError:
+                            # not a link into the base venv
+                            continue
+                    os.symlink(link_target, destination)
+                    if name in directory_names:
+                        directory_names.remove(name)
+                elif name in file_names and name != BASE_VENV_MARKER:
+                    clone_file(source, destination, build_path, venv_dir)
+    return str(venv_dir)
+
+
+def create_venv(tmp_dir=None, interpreter=DEFAULT_INTERPRETER, requirements=()):
+    """Clones a pooled base environment into `tmp_dir` (or a new temp dir)"""
     if not tmp_dir:
         tmp_dir = tempfile.mkdtemp()
-    virtualenv(tmp_dir)
-    return tmp_dir
+    return clone_venv(base_venv(interpreter, requirements), tmp_dir)
+
+
+@contextlib.contextmanager
+def verification_venv(interpreter=DEFAULT_INTERPRETER, requirements=()):
+    """A throwaway clone of a pooled environment, removed on exit"""
+    with util.mktmpdir() as tmp_dir:
+        yield create_venv(tmp_dir, interpreter, requirements)
 
 
 def install(package_name, venv_dir):
     if not os.path.exists(venv_dir):
         venv_dir = create_venv()
-    pip = f'{venv_dir}/bin/pip'
-    local[pip]('install', package_name)
+    pip = str(Path(venv_dir, BIN_DIRECTORY, 'pip'))
+    executables.command(pip)('install', package_name)
+
+
+def run(command, venv_dir):
+    """
+    Runs the shell-style `command` as if `venv_dir` were activated, preferring
+    the environment's own executables.
+    """
+    bin_directory = Path(venv_dir, BIN_DIRECTORY)
+    executable, *arguments = command.split(' ')
+    venv_executable = bin_directory.joinpath(executable)
+    if venv_executable.exists():
+        executable = str(venv_executable)
+
+    with tracing.span(f'venv {Path(executable).name}', 'venv', command=command):
+        return executables.command(executable).with_env(
+            PATH=os.pathsep.join([str(bin_directory), os.environ.get('PATH', '')]),
+            VIRTUAL_ENV=str(venv_dir),
+        )(*arguments)
@@ -1,37 +1,296 @@
+import hashlib
+import json
 import logging
+import os
+import queue
+import threading
+import time
+from subprocess import PIPE, STDOUT
 
-from plumbum import CommandNotFound, local
+from plumbum.commands import ProcessExecutionError
 
-from changes import shell
+from changes import (
+    artifact_cache,
+    executables,
+    impact,
+    metrics,
+    shell,
+    tracing,
+    util,
+    venv,
+)
+from changes.models.repository import GitRepository, working_tree_hash
 
 log = logging.getLogger(__name__)
 
 
+TEST_RUNNERS = ['tox', 'nosetests', 'py.test']
+# runners that can collect and select individual tests, for sharding
+SHARDABLE_TEST_RUNNERS = ['pytest', 'py.test']
+TEST_RESULT_CACHE_DIRECTORY = 'test-results'
+# byproducts of building and testing, which don't change what the tests exercise
+TEST_OUTPUTS = artifact_cache.BUILD_OUTPUTS + [
+    '.tox',
+    '.pytest_cache',
+    '__pycache__',
+    '.coverage',
+    'test-reports',
+]
+# written by release steps that run alongside the tests
+RELEASE_WRITTEN_FILES = ['CHANGELOG.md']
+
+
 def get_test_runner():
-    test_runners = ['tox', 'nosetests', 'py.test']
-    test_runner = None
-    for runner in test_runners:
-        try:
-            test_runner = local[runner]
-        except CommandNotFound:
-            continue
-    return test_runner
-
-
-def run_tests():
-    """Executes your tests."""
-    if test_runner := get_test_runner():
-        result = test_runner()
-        log.info('Test execution returned:\n%s' % result)
-        return result
+    """The first available test runner, in `TEST_RUNNERS` order"""
+    for runner in TEST_RUNNERS:
+        if executables.which(runner):
+            return executables.command(runner)
+    return None
+
+
+def get_shardable_test_runner():
+    for runner in SHARDABLE_TEST_RUNNERS:
+        if executables.which(runner):
+            return executables.command(runner)
+    return None
+
+
+def run_tests(sharded=False, workers=None, force=False, impacted=False):
+    """
+    Executes your tests.
+
+    In sharded mode, the suite is split across `workers` (by default, one
+    per CPU) pytest processes. In impacted mode, only the tests affected by
+    the changes since the latest version are run (see `run_impacted_tests`).
+
+    A passing run is recorded against the working tree hash, the runner and
+    the mode, and an identical later run reports that result instead of
+    running the suite again, unless `force` is set.
+    """
+    if impacted and (test_runner := get_shardable_test_runner()):
+        arguments = ['impacted']
+
+        def run():
+            return run_impacted_tests(test_runner)
+
+    elif sharded and (test_runner := get_shardable_test_runner()):
+        arguments = ['sharded']
+
+        def run():
+            return run_sharded_tests(test_runner, workers or os.cpu_count() or 1)
+
+    elif test_runner := get_test_runner():
+        arguments = []
+
+        def run():
+            result = test_runner()
+            log.info('Test execution returned:\n%s' % result)
+            return result
+
     else:
         log.info('No test runner found')
+        return None
 
-    return None
+    result_path = None
+    if tree_hash := tested_tree_hash():
+        key = test_run_key(tree_hash, test_runner, arguments)
+        result_path = util.cache_directory(TEST_RESULT_CACHE_DIRECTORY).joinpath(
+            f'{key}.json'
+        )
+        if not force:
+            metrics.cache_lookup('tests', result_path.exists())
+            if result_path.exists():
+                test_result = json.loads(result_path.read_text())
+                log.info(
+                    'Tests already passed on tree %s at %s, skipping:\n%s',
+                    test_result['tree'],
+                    test_result['recorded_at'],
+                    test_result['output'],
+                )
+                return test_result['output']
+
+    result = run()
+
+    # only passing runs are recorded, failures and empty selections are re-run
+    if result_path and result:
+        result_path.write_text(
+            json.dumps(
+                {
+                    'tree': tree_hash,
+                    'runner': str(test_runner.executable),
+                    'arguments': arguments,
+                    'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    'output': str(result),
+                }
+            )
+        )
+    return result
+
+
+def tested_tree_hash():
+    """The working tree hash, or `None` outside a git repository"""
+    try:
+        return working_tree_hash(excludes=TEST_OUTPUTS + RELEASE_WRITTEN_FILES)
+    except Exception as e:
+        log.info(f'Not caching test results, no tree hash: {e}')
+        return None
+
+
+def test_run_key(tree_hash, test_runner, arguments):
+    """Content address of a test run: the tree, the runner and its arguments"""
+    test_configuration = {
+        'tree': tree_hash,
+        'runner': artifact_cache.interpreter_identity(str(test_runner.executable)),
+        'arguments': arguments,
+    }
+    return hashlib.sha256(
+        json.dumps(test_configuration, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+
+def run_impacted_tests(test_runner):
+    """
+    Runs the tests affected by the changes since the latest version, selected
+    from the per-test coverage map of earlier runs.
+
+    The full suite runs when there is no map, when it wasn't recorded on the
+    history of HEAD, or when a change can affect any test. Every run is
+    recorded with pytest-cov, and updates the map.
+    """
+    impact_map = impact.ImpactMap.load()
+    latest_version_revision = GitRepository().latest_version_revision
+
+    selection = None
+    if impact_map and impact_map.is_fresh():
+        selection = impact_map.affected_tests(
+            impact.changed_files(latest_version_revision, impact_map.commit)
+        )
+        if selection is None:
+            log.info('Changes since %s affect every test', latest_version_revision)
+        elif not selection:
+            log.info('No tests affected by changes since %s', latest_version_revision)
+            return ''
+    else:
+        log.info('No current test impact map, running the full suite')
+
+    with util.mktmpdir() as tmp_dir:
+        coverage_file = os.path.join(tmp_dir, '.coverage')
+        with tracing.span('impacted tests', 'tests', tests=len(selection or [])):
+            result = test_runner[
+                impact.COVERAGE_ARGUMENTS + (selection or [])
+            ].with_env(COVERAGE_FILE=coverage_file)()
+        log.info('Test execution returned:\n%s' % result)
+        covered = impact.read_coverage_contexts(coverage_file, os.curdir)
+
+    head = impact.head_commit()
+    if selection is None or not impact_map:
+        impact_map = impact.ImpactMap(commit=head)
+        impact_map.update(covered, head)
+    else:
+        impact_map.update(
+            covered,
+            head,
+            rerun_test_files=[test for test in selection if '::' not in test],
+        )
+    impact_map.save()
+    return result
+
+
+def collect_tests(test_runner):
+    """The test ids collected by `test_runner`, grouped by test file"""
+    test_files = {}
+    # pytest exits with 5 when it collects no tests
+    for line in test_runner('--collect-only', '-q', retcode=(0, 5)).splitlines():
+        if '::' in line:
+            test_file, _ = line.split('::', 1)
+            test_files.setdefault(test_file, []).append(line)
+    return test_files
+
+
+def shard_tests(test_files, workers):
+    """
+    Splits the test files into at most `workers` shards, balanced by the
+    number of tests, largest files first.
+    """
+    shards = [[] for _ in range(min(workers, len(test_files)))]
+    shard_sizes = [0] * len(shards)
+    for test_file, test_ids in sorted(
+        test_files.items(), key=lambda item: len(item[1]), reverse=True
+    ):
+        smallest = shard_sizes.index(min(shard_sizes))
+        shards[smallest].append(test_file)
+        shard_sizes[smallest] += len(test_ids)
+    return shards
+
+
+def stream_output(shard_index, process, output_queue):
+    for line in process.stdout:
+        output_queue.put((shard_index, line.rstrip('\n'), None))
+    output_queue.put((shard_index, None, process.wait()))
+
+
+def run_sharded_tests(test_runner, workers):
+    """
+    Runs each shard of the suite in its own process, streaming their output
+    as it arrives and terminating the remaining shards on the first failure.
+    """
+    test_files = collect_tests(test_runner)
+    if not test_files:
+        log.info('No tests collected')
+        return None
+    shards = shard_tests(test_files, workers)
+    log.info(
+        'Running %d tests in %d shards',
+        sum(len(test_ids) for test_ids in test_files.values()),
+        len(shards),
+    )
+
+    output_queue = queue.Queue()
+    processes = []
+    with tracing.span('sharded tests', 'tests', shards=len(shards)):
+        for shard_index, shard in enumerate(shards):
+            process = test_runner[shard].popen(
+                stdout=PIPE, stderr=STDOUT, universal_newlines=True
+            )
+            processes.append(process)
+            threading.Thread(
+                target=stream_output,
+                args=(shard_index, process, output_queue),
+                daemon=True,
+            ).start()
+
+        outputs = [[] for _ in shards]
+        running = len(shards)
+        while running:
+            shard_index, line, returncode = output_queue.get()
+            if returncode is None:
+                log.info('[shard %d] %s', shard_index, line)
+                outputs[shard_index].append(line)
+                continue
+
+            running -= 1
+            if returncode != 0:
+                for process in processes:
+                    if process.poll() is None:
+                        process.terminate()
+                raise ProcessExecutionError(
+                    test_runner[shards[shard_index]].formulate(),
+                    returncode,
+                    '\n'.join(outputs[shard_index]),
+                    '',
+                )
+
+    result = '\n'.join(line for output in outputs for line in output)
+    log.info('All %d test shards passed', len(shards))
+    return result
 
 
-def run_test_command(context):
+def run_test_command(context, venv_dir=None):
+    """Runs the configured test command, inside `venv_dir` if given"""
     if context.test_command:
-        result = shell.dry_run(context.test_command, context.dry_run)
+        if venv_dir and not context.dry_run:
+            result = venv.run(context.test_command, venv_dir)
+        else:
+            result = shell.dry_run(context.test_command, context.dry_run)
         log.info('Test command "%s", returned %s', context.test_command, result)
     return True
@@ -0,0 +1,221 @@
+import difflib
+import logging
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import attr
+
+from changes import tracing
+
+log = logging.getLogger(__name__)
+
+# the version of `current_version = 0.0.1` (ini) or `current_version = "0.0.1"` (toml)
+CONFIG_CURRENT_VERSION = re.compile(
+    rb'^(current_version\s*=[ \t]*["\']?)[^"\'\s]+', re.MULTILINE
+)
+BUMPVERSION_SECTION_HEADER = re.compile(
+    rb'^\[(tool\.)?bumpversion\][ \t]*\r?$', re.MULTILINE
+)
+SECTION_HEADER = re.compile(rb'^\[', re.MULTILINE)
+# changes only knows `{current_version}` and `{new_version}`, not version parts
+UNSUPPORTED_VERSION_FILE_OPTIONS = ['parse', 'serialize']
+MAX_READERS = 32
+
+
+@attr.s
+class VersionFileChange(object):
+    """The content of a file before and after replacing its version"""
+
+    path = attr.ib(converter=Path)
+    content = attr.ib(repr=False)
+    new_content = attr.ib(repr=False)
+
+    @property
+    def diff(self):
+        return '\n'.join(
+            difflib.unified_diff(
+                self.content.decode('utf-8').splitlines(),
+                self.new_content.decode('utf-8').splitlines(),
+                fromfile=str(self.path),
+                tofile=str(self.path),
+                lineterm='',
+            )
+        )
+
+
+def read_files(paths):
+    """The content of every path, read concurrently"""
+    with ThreadPoolExecutor(max_workers=min(MAX_READERS, len(paths) or 1)) as executor:
+        return list(executor.map(lambda path: Path(path).read_bytes(), paths))
+
+
+def find_config_version(content):
+    """The `current_version` of the bumpversion section in `content`, or `None`"""
+    if not (header := BUMPVERSION_SECTION_HEADER.search(content)):
+        return None
+    next_header = SECTION_HEADER.search(content, header.end())
+    return CONFIG_CURRENT_VERSION.search(
+        content, header.end(), next_header.start() if next_header else len(content)
+    )
+
+
+def replace_config_version(config_path, content, new_version):
+    if not (match := find_config_version(content)):
+        raise Exception(
+            f'Did not find the bumpversion current_version in {config_path}'
+        )
+    return content[: match.end(1)] + new_version + content[match.end() :]
+
+
+def replace_version(bumpversion, path, content, current_version, new_version):
+    """
+    `content` with `current_version` replaced by `new_version`, using the
+    `search` and `replace` formats configured for the version file `path`.
+    """
+    options = bumpversion.version_file_options.get(str(path), {})
+    if unsupported := [
+        option for option in UNSUPPORTED_VERSION_FILE_OPTIONS if option in options
+    ]:
+        raise Exception(
+            f"Can't replace the version in {path}, "
+            f"bumpversion's {', '.join(unsupported)} options aren't supported"
+        )
+
+    versions = {
+        'current_version': current_version.decode('utf-8'),
+        'new_version': new_version.decode('utf-8'),
+    }
+    try:
+        search = options.get('search', '{current_version}').format(**versions)
+        replace = options.get('replace', '{new_version}').format(**versions)
+    except (KeyError, IndexError) as e:
+        raise Exception(f'Unsupported bumpversion placeholder {e} for {path}')
+
+    search, replace = search.encode('utf-8'), replace.encode('utf-8')
+    if search not in content:
+        raise Exception(f'Did not find {search.decode("utf-8")} in {path}')
+    return content.replace(search, replace)
+
+
+def plan_version_changes(bumpversion, new_version):
+    """
+    The changes that replace `bumpversion.current_version` with `new_version`
+    in every configured version file, and in the bumpversion configuration.
+
+    Version files are changed with their bumpversion `search` and `replace`
+    formats, by default every occurrence of the current version.
+
+    Nothing is written, so the changes double as a draft. Raises when a
+    version file doesn't contain its search text.
+    """
+    config_path = bumpversion.config_path
+    paths = list(
+        dict.fromkeys(Path(path) for path in bumpversion.version_files_to_replace)
+    )
+    # a config file that is also a version file (`setup.cfg`) gets one change
+    config_is_version_file = config_path in paths
+    if config_is_version_file:
+        paths.remove(config_path)
+    current_version = str(bumpversion.current_version).encode('utf-8')
+    new_version = str(new_version).encode('utf-8')
+
+    with tracing.span('plan version changes', 'version', files=len(paths)):
+        *contents, config_content = read_files(paths + [config_path])
+
+        changes = [
+            VersionFileChange(
+                path,
+                content,
+                replace_version(
+                    bumpversion, path, content, current_version, new_version
+                ),
+            )
+            for path, content in zip(paths, contents)
+        ]
+
+        new_config_content = config_content
+        if config_is_version_file:
+            new_config_content = replace_version(
+                bumpversion, config_path, config_content, current_version, new_version
+            )
+        changes.append(
+            VersionFileChange(
+                config_path,
+                config_content,
+                replace_config_version(config_path, new_config_content, new_version),
+            )
+        )
+    return changes
+
+
+def only_version_changed(bumpversion, committed_content):
+    """
+    Whether the bumpversion configuration differs from `committed_content`
+    by nothing but the version bump, so that it's safe to discard or commit
+    as a whole, even when it's a shared file like `setup.cfg`.
+    """
+    if not (match := find_config_version(committed_content)):
+        return False
+    committed_version = match.group(0)[len(match.group(1)) :]
+    current_version = str(bumpversion.current_version).encode('utf-8')
+    config_path = bumpversion.config_path
+
+    expected_content = committed_content
+    try:
+        if config_path in map(Path, bumpversion.version_files_to_replace):
+            expected_content = replace_version(
+                bumpversion,
+                config_path,
+                expected_content,
+                committed_version,
+                current_version,
+            )
+    except Exception:
+        return False
+    expected_content = replace_config_version(
+        config_path, expected_content, current_version
+    )
+    return expected_content == Path(config_path).read_bytes()
+
+
+def write_atomically(path, content):
+    file_descriptor, tmp_path = tempfile.mkstemp(
+        dir=Path(path).parent, prefix=f'.{Path(path).name}.'
+    )
+    with os.fdopen(file_descriptor, 'wb') as tmp_file:
+        tmp_file.write(content)
+    shutil.copymode(path, tmp_path)
+    return tmp_path
+
+
+def apply_version_changes(changes):
+    """
+    Writes every change as one transaction: all new contents are written to
+    temporary files beside their targets, then renamed into place. If any
+    step fails, the files already replaced are restored.
+    """
+    staged = []
+    replaced = []
+    with tracing.span('apply version changes', 'version', files=len(changes)):
+        try:
+            for change in changes:
+                staged.append(
+                    (change, write_atomically(change.path, change.new_content))
+                )
+
+            for change, tmp_path in staged:
+                os.replace(tmp_path, change.path)
+                replaced.append(change)
+        except BaseException:
+            for change in replaced:
+                log.error(f'Restoring {change.path}')
+                os.replace(write_atomically(change.path, change.content), change.path)
+            raise
+        finally:
+            for _, tmp_path in staged:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
@@ -0,0 +1,222 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+import attr
+
+from changes.models.repository import git, git_lines
+
+log = logging.getLogger(__name__)
+
+POLL_INTERVAL = 1.0
+DEBOUNCE_INTERVAL = 0.2
+
+# git rewrites `HEAD` and `packed-refs` through `<name>.lock` files
+GIT_DIR_REF_FILES = ['HEAD', 'packed-refs']
+REFS_DIRECTORY = 'refs'
+LOCK_SUFFIX = '.lock'
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC if hasattr(os, 'O_CLOEXEC') else 0
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def git_dir():
+    return Path(git('rev-parse --git-dir').strip()).resolve()
+
+
+def ref_snapshot():
+    """Maps every ref (and `HEAD`) to the object it points at"""
+    snapshot = dict(
+        reversed(line.split(' ', 1))
+        for line in git_lines('for-each-ref --format="%(objectname) %(refname)"')
+        if line
+    )
+    snapshot['HEAD'] = git('rev-parse HEAD').strip()
+    return snapshot
+
+
+def changed_refs(previous_snapshot, current_snapshot):
+    """Names of the refs that were created, moved or deleted"""
+    return sorted(
+        ref_name
+        for ref_name in set(previous_snapshot) | set(current_snapshot)
+        if previous_snapshot.get(ref_name) != current_snapshot.get(ref_name)
+    )
+
+
+def is_tag(ref_name):
+    return ref_name.startswith('refs/tags/')
+
+
+def is_relevant(file_name):
+    return not file_name.endswith(LOCK_SUFFIX)
+
+
+@attr.s
+class PollingWatcher(object):
+    """Detects ref changes by comparing `stat` snapshots of the ref files"""
+
+    git_dir = attr.ib()
+    interval = attr.ib(default=POLL_INTERVAL)
+    _snapshot = attr.ib(default=None, init=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self._snapshot = self.stat_snapshot()
+
+    def ref_paths(self):
+        paths = [self.git_dir / file_name for file_name in GIT_DIR_REF_FILES]
+        for directory, _, file_names in os.walk(self.git_dir / REFS_DIRECTORY):
+            paths.extend(
+                Path(directory) / file_name
+                for file_name in file_names
+                if is_relevant(file_name)
+            )
+        return paths
+
+    def stat_snapshot(self):
+        snapshot = {}
+        for path in self.ref_paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Blocks until a ref file changes, returns `False` on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(self.interval)
+            snapshot = self.stat_snapshot()
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                return True
+        return False
+
+    def close(self):
+        pass
+
+
+@attr.s
+class InotifyWatcher(object):
+    """Detects ref changes through inotify (Linux only)"""
+
+    git_dir = attr.ib()
+    _libc = attr.ib(default=None, init=False, repr=False)
+    _fd = attr.ib(default=None, init=False, repr=False)
+    _watches = attr.ib(default=attr.Factory(dict), init=False, repr=False)
+
+    @staticmethod
+    def load_libc():
+        if not sys.platform.startswith('linux'):
+            return None
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return None
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        return libc if hasattr(libc, 'inotify_init1') else None
+
+    def __attrs_post_init__(self):
+        self._libc = self.load_libc()
+        if not self._libc:
+            raise OSError('inotify is not available')
+
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self.add_watch(self.git_dir)
+        for directory, _, _ in os.walk(self.git_dir / REFS_DIRECTORY):
+            self.add_watch(Path(directory))
+
+    def add_watch(self, path):
+        watch_descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(str(path)), WATCH_MASK
+        )
+        if watch_descriptor < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {path}')
+        self._watches[watch_descriptor] = path
+
+    def read_events(self):
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, _, name_length = EVENT_HEADER.unpack_from(
+                buffer, offset
+            )
+            offset += EVENT_HEADER.size
+            name = buffer[offset : offset + name_length].rstrip(b'\0').decode()
+            offset += name_length
+            events.append((self._watches.get(watch_descriptor), mask, name))
+        return events
+
+    def is_ref_event(self, directory, mask, name):
+        if directory is None:
+            return False
+
+        if directory == self.git_dir:
+            return name in GIT_DIR_REF_FILES
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_watch(directory / name)
+            return False
+
+        return is_relevant(name)
+
+    def wait(self, timeout=None):
+        """Blocks until a ref file changes, returns `False` on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+
+            if any([self.is_ref_event(*event) for event in self.read_events()]):
+                # git updates several files per operation, coalesce them
+                time.sleep(DEBOUNCE_INTERVAL)
+                [self.is_ref_event(*event) for event in self.read_events()]
+                return True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def watcher_for(repository_git_dir=None):
+    """An inotify watcher where supported, otherwise a polling one"""
+    repository_git_dir = repository_git_dir or git_dir()
+    try:
+        return InotifyWatcher(repository_git_dir)
+    except OSError as e:
+        log.info(f'Falling back to polling for ref changes: {e}')
+        return PollingWatcher(repository_git_dir)
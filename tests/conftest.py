@@ -8,7 +8,7 @@ from click.testing import CliRunner
 from plumbum.cmd import git
 
 import changes
-from changes import compat
+from changes import compat, executables
 
 pytest_plugins = 'pytester'
 
@@ -75,6 +75,32 @@ BUG_LABEL_JSON = [
 RELEASES_URL = 'https://api.github.com/repos/michaeljoseph/test_app/releases'
 
 
+@pytest.fixture(autouse=True)
+def cache_directory(tmp_path_factory, monkeypatch):
+    cache_directory = tmp_path_factory.mktemp('changes_cache')
+    monkeypatch.setenv('CHANGES_CACHE_DIR', str(cache_directory))
+    return cache_directory
+
+
+@pytest.fixture
+def fake_executable(tmp_path, monkeypatch):
+    """Writes scripts to an executables directory at the front of the `PATH`"""
+    bin_directory = tmp_path.joinpath('bin')
+    bin_directory.mkdir()
+    monkeypatch.setenv(
+        'PATH', os.pathsep.join([str(bin_directory), os.environ['PATH']])
+    )
+
+    def write_executable(name, script):
+        executable = bin_directory.joinpath(name)
+        executable.write_text(script)
+        executable.chmod(0o755)
+        executables.invalidate()
+        return executable
+
+    return write_executable
+
+
 @pytest.fixture
 def git_repo(tmpdir):
     with CliRunner().isolated_filesystem() as repo_dir:
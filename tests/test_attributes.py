@@ -5,12 +5,10 @@ from changes import attributes
 from . import context
 
 
-@pytest.mark.skip('bumpversion')
 def test_extract_attribute(python_module):
     assert '0.0.1' == attributes.extract_attribute('test_app', '__version__')
 
 
-@pytest.mark.skip('bumpversion')
 def test_replace_attribute(python_module):
     attributes.replace_attribute('test_app', '__version__', '1.0.0', dry_run=False)
     expected_content = list(context.initial_init_content)
@@ -18,13 +16,49 @@ def test_replace_attribute(python_module):
     assert '\n'.join(expected_content) == ''.join(open(context.tmp_file).readlines())
 
 
-@pytest.mark.skip('bumpversion')
 def test_replace_attribute_dry_run(python_module):
     attributes.replace_attribute('test_app', '__version__', '1.0.0', dry_run=True)
     expected_content = list(context.initial_init_content)
     assert '\n'.join(expected_content) == ''.join(open(context.tmp_file).readlines())
 
 
-@pytest.mark.skip('bumpversion')
 def test_has_attribute(python_module):
     assert attributes.has_attribute(context.module_name, '__version__')
+
+
+def test_module_attributes_single_parse(tmp_path):
+    init_path = tmp_path / '__init__.py'
+    init_path.write_text(
+        '"""Ünïcode docstring"""\n'
+        '__version__ = "0.0.1"\n'
+        "__url__: str = 'https://github.com/someuser/test_app'\n"
+        "__author__ = __maintainer__ = 'Some User'\n"
+        'VERSION_INFO = (0, 0, 1)\n'
+    )
+    module = attributes.ModuleAttributes.parse(init_path)
+
+    assert '0.0.1' == module.get('__version__')
+    assert 'Some User' == module.get('__maintainer__')
+    assert '__url__' in module
+    assert 'VERSION_INFO' not in module
+
+    module.write({'__version__': '1.0.0', '__url__': 'https://example.com'}, False)
+    assert (
+        '"""Ünïcode docstring"""\n'
+        '__version__ = "1.0.0"\n'
+        "__url__: str = 'https://example.com'\n"
+        "__author__ = __maintainer__ = 'Some User'\n"
+        'VERSION_INFO = (0, 0, 1)\n'
+    ) == init_path.read_text()
+
+
+def test_chained_assignment_is_replaced_once(tmp_path):
+    init_path = tmp_path / '__init__.py'
+    init_path.write_text("__version__ = VERSION = '0.0.1'\n")
+    module = attributes.ModuleAttributes.parse(init_path)
+
+    assert "__version__ = VERSION = '1.0.0'\n" == module.replaced(
+        {'__version__': '1.0.0', 'VERSION': '1.0.0'}
+    ).decode('utf-8')
+    with pytest.raises(ValueError, match='cannot have different values'):
+        module.replaced({'__version__': '1.0.0', 'VERSION': '2.0.0'})
@@ -0,0 +1,155 @@
+import copy
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from plumbum.cmd import git
+from plumbum.commands import ProcessExecutionError
+
+from changes import flow, vcs
+from changes.checkpoint import Checkpoint
+from changes.packaging import DEFAULT_INTERPRETER, Artifact
+from changes.scheduler import Pipeline, Step
+
+from . import context
+
+
+def test_pipeline_resumes_from_first_incomplete_step(tmp_path):
+    ran = []
+    upload_attempts = []
+
+    def build():
+        ran.append('build')
+        return [Artifact(path='dist/test_app-0.0.2.tar.gz', kind='sdist')]
+
+    def upload():
+        upload_attempts.append(1)
+        if len(upload_attempts) == 1:
+            raise Exception('connection reset')
+        ran.append('upload')
+        return 'https://uploads.github.com/releases/1/assets{?name}'
+
+    def steps():
+        return [Step('build', build), Step('upload', upload, ['build'])]
+
+    with pytest.raises(Exception, match='connection reset'):
+        Pipeline(steps(), checkpoint=Checkpoint.load('test_app', '0.0.2')).run()
+
+    checkpoint = Checkpoint.load('test_app', '0.0.2')
+    assert [
+        {
+            'path': 'dist/test_app-0.0.2.tar.gz',
+            'kind': 'sdist',
+            'interpreter': DEFAULT_INTERPRETER,
+            'sha256': None,
+            'size': None,
+        }
+    ] == checkpoint.output('build')
+    assert not checkpoint.is_complete('upload')
+
+    results = Pipeline(steps(), checkpoint=checkpoint).run()
+
+    assert ['build', 'upload'] == ran
+    assert results['upload'] == Checkpoint.load('test_app', '0.0.2').output('upload')
+
+    checkpoint.clear()
+    assert {} == Checkpoint.load('test_app', '0.0.2').completed
+
+
+@pytest.mark.parametrize('github', [True, False])
+def test_release_steps(github):
+    release_context = copy.copy(context)
+    release_context.github = github
+    checkpoint = Checkpoint.load(context.module_name, context.new_version)
+
+    order = Pipeline(
+        flow.release_steps(release_context, checkpoint)
+    ).topological_order()
+
+    assert 'run_tests' == order[0]
+    assert ('review_release' if github else 'tag_and_push') == order[-1]
+    steps = {
+        step.name: step for step in flow.release_steps(release_context, checkpoint)
+    }
+    assert ['install_from_pypi'] == steps['commit_version_change'].dependencies
+
+
+def test_steps_finishing_after_a_failure_are_checkpointed(tmp_path):
+    ran = []
+    upload_started = threading.Event()
+
+    def changelog():
+        # still running when the upload fails
+        upload_started.wait(timeout=5)
+        time.sleep(0.1)
+        ran.append('changelog')
+        return 'CHANGELOG.md'
+
+    def upload():
+        upload_started.set()
+        raise Exception('connection reset')
+
+    def steps():
+        return [Step('changelog', changelog), Step('upload', upload)]
+
+    checkpoint = Checkpoint(path=tmp_path / 'checkpoint.json', release='test_app')
+    with pytest.raises(Exception, match='connection reset'):
+        Pipeline(steps(), checkpoint=checkpoint).run()
+    assert checkpoint.is_complete('changelog')
+
+    resumed = Checkpoint(path=tmp_path / 'checkpoint.json', release='test_app')
+    resumed.completed = copy.deepcopy(checkpoint.completed)
+    with pytest.raises(Exception, match='connection reset'):
+        Pipeline(steps(), checkpoint=resumed).run()
+    assert ['changelog'] == ran
+
+
+def test_resumed_release_skips_done_commit_and_tag(python_module, tmp_path):
+    release_context = copy.copy(context)
+    release_context.dry_run = False
+    push_url = git('remote', 'get-url', '--push', 'origin').strip()
+    push_repo = Path(push_url[len('file://') :])
+    git('config', 'branch.master.remote', 'origin')
+    git('config', 'branch.master.merge', 'refs/heads/master')
+    Path('test_app/__init__.py').write_text("__version__ = '0.0.2'\n")
+    Path('CHANGELOG.md').write_text('# 0.0.2\n')
+
+    def steps():
+        return [
+            Step(
+                'commit_version_change',
+                lambda: vcs.commit_version_change(release_context),
+            ),
+            Step(
+                'tag_and_push',
+                lambda: vcs.tag_and_push(release_context),
+                ['commit_version_change'],
+            ),
+        ]
+
+    checkpoint = Checkpoint(path=tmp_path / 'checkpoint.json', release='test_app')
+
+    # committed, but the push fails
+    git('remote', 'set-url', '--push', 'origin', str(tmp_path / 'missing.git'))
+    with pytest.raises(ProcessExecutionError):
+        Pipeline(steps(), checkpoint=checkpoint).run()
+    assert not vcs.has_changes(['test_app/__init__.py', 'CHANGELOG.md'])
+
+    # tagged, but the remote rejects the tag
+    git('remote', 'set-url', '--push', 'origin', push_url)
+    pre_receive = push_repo.joinpath('hooks', 'pre-receive')
+    pre_receive.write_text('#!/bin/sh\n! grep -q refs/tags/\n')
+    pre_receive.chmod(0o755)
+    with pytest.raises(ProcessExecutionError):
+        Pipeline(steps(), checkpoint=checkpoint).run()
+    assert checkpoint.is_complete('commit_version_change')
+    assert '0.0.2' == git('tag', '--list', '0.0.2').strip()
+
+    pre_receive.unlink()
+    Pipeline(steps(), checkpoint=checkpoint).run()
+
+    assert 1 == git('log', '--format=%s').count('0.0.2')
+    assert git('rev-parse', '0.0.2^{commit}') == git(
+        '--git-dir', str(push_repo), 'rev-parse', '0.0.2^{commit}'
+    )
@@ -0,0 +1,68 @@
+import pytest
+import semantic_version
+
+from changes import determine_release
+from changes.classifier import Classifier, KeywordAutomaton
+from changes.models import ReleaseType
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton.build(['he', 'she', 'his', 'hers'])
+
+    assert ['he', 'hers', 'she'] == sorted(automaton.search('ushers'))
+    assert [] == list(automaton.search('nothing to see'))
+
+
+def test_breaking_change_in_body_is_major():
+    latest_version = semantic_version.Version('0.7.0')
+    descriptions = ['Drop python 2\nBREAKING CHANGE: removes the py2 shims']
+
+    assert (
+        'major',
+        ReleaseType.BREAKING_CHANGE,
+        semantic_version.Version('1.0.0'),
+    ) == determine_release(latest_version, descriptions, {'enhancement'})
+
+
+@pytest.mark.parametrize(
+    'labels, expected',
+    [
+        ({'enhancement', 'bug'}, ('minor', ReleaseType.FEATURE, '0.8.0')),
+        ({'bug'}, ('patch', ReleaseType.FIX, '0.7.1')),
+        ({'docs'}, (None, ReleaseType.NO_CHANGE, '0.7.0')),
+    ],
+)
+def test_default_label_mapping(labels, expected):
+    part, release_type, version = determine_release(
+        semantic_version.Version('0.7.0'), ['A title\nA body'], labels
+    )
+
+    assert expected == (part, release_type, str(version))
+
+
+def test_configured_rules():
+    classifier = Classifier.from_config(
+        {
+            'keywords': {'[security]': 'patch'},
+            'patterns': {r'^feat(\(\w+\))?!:': 'major', r'^feat(\(\w+\))?:': 'minor'},
+            'labels': {'feature': 'minor'},
+        }
+    )
+
+    assert ('patch', ReleaseType.FIX) == classifier.classify(
+        ['[security] bump requests'], set()
+    )
+    assert ('minor', ReleaseType.FEATURE) == classifier.classify(
+        ['fix: typo', 'feat(cli): add --fast'], set()
+    )
+    assert ('major', ReleaseType.BREAKING_CHANGE) == classifier.classify(
+        ['Title\nfeat!: drop the status command'], {'feature'}
+    )
+    assert ('minor', ReleaseType.FEATURE) == classifier.classify(
+        ['BREAKING CHANGE is not configured'], {'feature'}
+    )
+
+
+def test_unknown_bump_part_raises():
+    with pytest.raises(ValueError, match='Unknown bump part huge'):
+        Classifier.from_config({'labels': {'bug': 'huge'}})
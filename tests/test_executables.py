@@ -0,0 +1,65 @@
+import os
+
+import pytest
+from plumbum.commands import CommandNotFound
+
+from changes import executables, verification
+
+
+@pytest.fixture
+def bin_directory(tmp_path, monkeypatch):
+    bin_directory = tmp_path.joinpath('bin')
+    bin_directory.mkdir()
+    monkeypatch.setenv('PATH', str(bin_directory))
+    return bin_directory
+
+
+def make_executable(path):
+    path.write_text('#!/bin/sh\n')
+    path.chmod(0o755)
+    return path
+
+
+def test_which_finds_git():
+    assert executables.which('git').name == 'git'
+
+
+def test_which_missing_executable():
+    assert executables.which('foo') is None
+    with pytest.raises(CommandNotFound):
+        executables.command('foo')
+
+
+def test_first_executable_on_path_wins(tmp_path, monkeypatch):
+    first, second = tmp_path.joinpath('first'), tmp_path.joinpath('second')
+    first.mkdir()
+    second.mkdir()
+    make_executable(second.joinpath('tool'))
+    first_tool = make_executable(first.joinpath('tool'))
+    first.joinpath('not-executable').write_text('')
+
+    monkeypatch.setenv('PATH', os.pathsep.join([str(first), str(second)]))
+
+    assert first_tool == executables.which('tool')
+    assert executables.which('not-executable') is None
+
+
+def test_index_is_rescanned_when_path_changes(bin_directory, monkeypatch):
+    assert executables.which('tool') is None
+
+    other_directory = bin_directory.parent.joinpath('other')
+    other_directory.mkdir()
+    tool = make_executable(other_directory.joinpath('tool'))
+    monkeypatch.setenv('PATH', str(other_directory))
+
+    assert tool == executables.which('tool')
+
+
+def test_get_test_runner_prefers_the_first_runner(bin_directory):
+    assert verification.get_test_runner() is None
+
+    make_executable(bin_directory.joinpath('py.test'))
+    make_executable(bin_directory.joinpath('tox'))
+    executables.invalidate()
+
+    assert str(bin_directory.joinpath('tox')) == str(verification.get_test_runner())
@@ -0,0 +1,140 @@
+import sqlite3
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from plumbum.cmd import git
+
+from changes import impact, verification
+
+FAKE_PYTEST = textwrap.dedent("""\
+    #!{python}
+    # records each run, and the coverage of a two test suite with per-test contexts
+    import os, sqlite3, sys
+
+    arguments = [argument for argument in sys.argv[1:] if not argument.startswith('-')]
+    with open({runs_log!r}, 'a') as runs_log:
+        runs_log.write(' '.join(arguments) + '\\n')
+
+    suite = {{
+        'tests/test_a.py::test_a': ['a.py', 'tests/test_a.py'],
+        'tests/test_b.py::test_b': ['b.py', 'tests/test_b.py'],
+    }}
+    connection = sqlite3.connect(os.environ['COVERAGE_FILE'])
+    connection.executescript({schema!r})
+    for test_id, covered_files in suite.items():
+        if arguments and not any(test_id.startswith(argument) for argument in arguments):
+            continue
+        context_id = connection.execute(
+            'INSERT INTO context (context) VALUES (?)', (test_id + '|run',)
+        ).lastrowid
+        for covered_file in covered_files:
+            connection.execute('INSERT OR IGNORE INTO file (path) VALUES (?)', (os.path.abspath(covered_file),))
+            (file_id,) = connection.execute('SELECT id FROM file WHERE path = ?', (os.path.abspath(covered_file),)).fetchone()
+            connection.execute('INSERT INTO line_bits VALUES (?, ?, ?)', (file_id, context_id, b'\\x01'))
+    connection.commit()
+    print('passed')
+    """)
+
+COVERAGE_SCHEMA = textwrap.dedent("""\
+    CREATE TABLE file (id INTEGER PRIMARY KEY, path TEXT UNIQUE);
+    CREATE TABLE context (id INTEGER PRIMARY KEY, context TEXT UNIQUE);
+    CREATE TABLE line_bits (file_id INTEGER, context_id INTEGER, numbits BLOB);
+    """)
+
+
+def write_coverage_data(data_file, covered):
+    connection = sqlite3.connect(str(data_file))
+    connection.executescript(COVERAGE_SCHEMA)
+    for context, paths in covered.items():
+        context_id = connection.execute(
+            'INSERT INTO context (context) VALUES (?)', (context,)
+        ).lastrowid
+        for path in paths:
+            file_id = connection.execute(
+                'INSERT OR IGNORE INTO file (path) VALUES (?)', (path,)
+            ).lastrowid
+            connection.execute(
+                'INSERT INTO line_bits VALUES (?, ?, ?)', (file_id, context_id, b'')
+            )
+    connection.commit()
+    connection.close()
+
+
+def test_read_coverage_contexts(tmp_path):
+    data_file = tmp_path / '.coverage'
+    write_coverage_data(
+        data_file,
+        {
+            'tests/test_a.py::test_a|run': [str(tmp_path / 'a.py')],
+            'tests/test_b.py::test_b[1]|setup': [str(tmp_path / 'b.py')],
+            '': [str(tmp_path / 'c.py'), '/elsewhere/site-packages/d.py'],
+        },
+    )
+
+    assert {
+        'tests/test_a.py::test_a': {'a.py'},
+        'tests/test_b.py::test_b[1]': {'b.py'},
+    } == impact.read_coverage_contexts(data_file, tmp_path)
+
+
+def test_affected_tests(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    Path('tests').mkdir()
+    Path('tests/test_c.py').write_text('')
+    impact_map = impact.ImpactMap(
+        commit='abc',
+        tests={
+            'tests/test_a.py::test_a': ['a.py', 'tests/test_a.py'],
+            'tests/test_b.py::test_b': ['b.py', 'tests/test_b.py'],
+        },
+    )
+
+    assert ['tests/test_a.py::test_a'] == impact_map.affected_tests({'a.py'})
+    assert ['tests/test_c.py'] == impact_map.affected_tests({'tests/test_c.py'})
+    assert impact_map.affected_tests({'README.md'}) is None
+    assert impact_map.affected_tests({'a.py', 'data/fixture.json'}) is None
+    assert impact_map.affected_tests({'tests/conftest.py'}) is None
+
+
+@pytest.fixture
+def fake_pytest(fake_executable, tmp_path):
+    runs_log = tmp_path.joinpath('bin', 'runs.log')
+    fake_executable(
+        'pytest',
+        FAKE_PYTEST.format(
+            python=sys.executable, runs_log=str(runs_log), schema=COVERAGE_SCHEMA
+        ),
+    )
+    return runs_log
+
+
+def test_run_tests_selects_impacted_tests(git_repo, fake_pytest):
+    for path in ['a.py', 'b.py', 'tests/test_a.py', 'tests/test_b.py']:
+        Path(path).parent.mkdir(exist_ok=True)
+        Path(path).write_text('')
+    git('add', '.')
+    git('commit', '-m', 'Add a test suite')
+    git('tag', '0.0.2')
+
+    verification.run_tests(impacted=True)
+
+    Path('a.py').write_text('a = 1')
+    git('commit', '-am', 'Change a')
+    verification.run_tests(impacted=True)
+
+    git('tag', '0.0.3')
+    assert '' == verification.run_tests(impacted=True, force=True)
+    # the empty selection didn't replace the recorded run of this tree
+    assert 'passed' in verification.run_tests(impacted=True)
+
+    # no test covers the README, so changing it runs the full suite
+    Path('README.md').write_text('# Test App')
+    verification.run_tests(impacted=True)
+
+    assert [
+        '',
+        'tests/test_a.py::test_a',
+        '',
+    ] == fake_pytest.read_text().splitlines()
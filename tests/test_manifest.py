@@ -0,0 +1,64 @@
+import os
+
+from changes.manifest import MANIFEST_FILE, ReleaseManifest, content_hash
+
+
+def test_record_and_look_up_release(tmp_path):
+    release_file = tmp_path.joinpath('0.0.2-2026-10-19.md')
+    release_file.write_text('# 0.0.2 (2026-10-19)')
+    tmp_path.joinpath('0.0.1-2026-10-01.md').write_text('# 0.0.1 (2026-10-01)')
+
+    ReleaseManifest.load(tmp_path).record('0.0.2', release_file, '2026-10-19')
+
+    manifest = ReleaseManifest.load(tmp_path)
+    assert release_file == manifest.release_file('0.0.2')
+    assert content_hash(release_file) == manifest.releases['0.0.2'].sha256
+    assert manifest.release_file('0.0.3') is None
+
+
+def test_missing_release_file_is_not_staged(tmp_path):
+    release_file = tmp_path.joinpath('0.0.2-2026-10-19.md')
+    release_file.write_text('# 0.0.2 (2026-10-19)')
+    ReleaseManifest.load(tmp_path).record('0.0.2', release_file, '2026-10-19')
+
+    release_file.unlink()
+
+    assert ReleaseManifest.load(tmp_path).release_file('0.0.2') is None
+
+
+def test_removing_the_last_release_removes_the_manifest(tmp_path):
+    release_file = tmp_path.joinpath('0.0.2-2026-10-19.md')
+    release_file.write_text('# 0.0.2 (2026-10-19)')
+    ReleaseManifest.load(tmp_path).record('0.0.2', release_file, '2026-10-19')
+    assert MANIFEST_FILE in os.listdir(tmp_path)
+
+    ReleaseManifest.load(tmp_path).remove('0.0.2')
+
+    assert [release_file.name] == os.listdir(tmp_path)
+
+
+def test_release_staged_without_a_manifest_is_recorded(tmp_path):
+    tmp_path.joinpath('0.0.2-rc.1-2026-10-01.md').write_text('# 0.0.2-rc.1')
+    release_file = tmp_path.joinpath('0.0.2-2026-10-19-Icarus.md')
+    release_file.write_text('# 0.0.2 (2026-10-19) Icarus')
+
+    assert release_file == ReleaseManifest.load(tmp_path).release_file('0.0.2')
+
+    entry = ReleaseManifest.load(tmp_path).releases['0.0.2']
+    assert (release_file.name, '2026-10-19') == (entry.file, entry.date)
+    assert ReleaseManifest.load(tmp_path).release_file('0.0.3') is None
+
+
+def test_edited_release_file_is_rerecorded(tmp_path, caplog):
+    release_file = tmp_path.joinpath('0.0.2-2026-10-19.md')
+    release_file.write_text('# 0.0.2 (2026-10-19)')
+    ReleaseManifest.load(tmp_path).record('0.0.2', release_file, '2026-10-19')
+
+    release_file.write_text('# 0.0.2 (2026-10-19)\nEdited by hand')
+
+    assert release_file == ReleaseManifest.load(tmp_path).release_file('0.0.2')
+    assert 'was edited since it was staged' in caplog.text
+    assert (
+        content_hash(release_file)
+        == ReleaseManifest.load(tmp_path).releases['0.0.2'].sha256
+    )
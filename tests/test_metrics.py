@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+
+import pytest
+import responses
+from click.testing import CliRunner
+
+from changes import metrics
+from changes.cli import main
+from changes.models.repository import git
+
+from .conftest import LABEL_URL
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    return registry
+
+
+def test_counters_and_summaries(registry):
+    registry.inc('changes_http_requests', method='GET', status=200)
+    registry.inc('changes_http_requests', method='GET', status=200)
+    registry.observe('changes_step_seconds', 0.5, step='stage')
+    registry.observe('changes_step_seconds', 1.5, step='stage')
+
+    assert 2 == registry.get('changes_http_requests', method='GET', status=200)
+    assert (2, 2.0) == registry.get('changes_step_seconds', step='stage')
+
+    with pytest.raises(KeyError):
+        registry.inc('unknown_metric')
+
+
+def test_openmetrics_format(registry):
+    registry.inc('changes_cache_hits', cache='http')
+    registry.observe('changes_step_seconds', 0.25, step='status')
+
+    assert [
+        '# TYPE changes_cache_hits counter',
+        '# HELP changes_cache_hits Cache hits by cache',
+        'changes_cache_hits_total{cache="http"} 1',
+        '# TYPE changes_step_seconds summary',
+        '# HELP changes_step_seconds Pipeline step duration in seconds',
+        'changes_step_seconds_count{step="status"} 1',
+        'changes_step_seconds_sum{step="status"} 0.25',
+        '# EOF',
+    ] == registry.to_openmetrics().splitlines()
+
+
+def test_git_commands_are_timed(git_repo, registry):
+    git('tag --list')
+
+    count, _ = registry.get('changes_git_command_seconds', subcommand='tag')
+    assert 1 == count
+
+
+@responses.activate
+def test_metrics_file_option(configured, registry, mocker):
+    mocker.patch('changes.cli.requests_cache')
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=[],
+        status=200,
+        content_type='application/json',
+    )
+
+    result = CliRunner().invoke(main, ['--metrics-file', 'metrics.json', 'status'])
+    assert 0 == result.exit_code, result.output
+
+    written_metrics = json.loads(Path('metrics.json').read_text())
+    (step_sample,) = written_metrics['changes_step_seconds']['samples']
+    assert {'step': 'status'} == step_sample['labels']
+    assert 1 == step_sample['count']
+    assert 'changes_git_command_seconds' in written_metrics
@@ -1,15 +1,142 @@
+import contextlib
+import copy
+import textwrap
+from pathlib import Path
+
+import pytest
 from click.testing import CliRunner
 
-from changes import packaging
+from changes import artifact_cache, packaging
 
 from . import context
 
+FAKE_BUILD_FRONTEND = textwrap.dedent(
+    """\
+    #!/bin/sh
+    # <interpreter> -m build --<kind> --outdir <output> <source>
+    test -f "$6/setup.py" || exit 1
+    echo "$3" >> "$(dirname "$0")/builds.log"
+    mkdir -p "$5"
+    case "$3" in
+        --sdist) echo sdist > "$5/test_app-0.0.1.tar.gz" ;;
+        --wheel) echo wheel > "$5/test_app-0.0.1-py3-none-any.whl" ;;
+    esac
+    """
+)
+
+
+@pytest.fixture
+def fake_build_frontend(fake_executable):
+    fake_executable('fake-python', FAKE_BUILD_FRONTEND)
+
+    build_context = copy.copy(context)
+    build_context.dry_run = False
+    build_context.build_interpreters = ['fake-python']
+    return build_context
+
 
 def test_build_distributions():
     with CliRunner().isolated_filesystem():
         packaging.build_distributions(context)
 
 
+def test_build_distributions_manifest(python_module, fake_build_frontend):
+    manifest = packaging.build_distributions(fake_build_frontend)
+
+    assert [packaging.SDIST, packaging.WHEEL] == [
+        artifact.kind for artifact in manifest
+    ]
+    assert [
+        'dist/test_app-0.0.1.tar.gz',
+        'dist/test_app-0.0.1-py3-none-any.whl',
+    ] == [artifact.path.as_posix() for artifact in manifest]
+    assert all(artifact.path.exists() for artifact in manifest)
+    assert all(len(artifact.sha256) == 64 for artifact in manifest)
+
+
+def test_build_distributions_lists_each_file_once(
+    python_module, fake_build_frontend, fake_executable, tmp_path
+):
+    fake_executable('other-python', FAKE_BUILD_FRONTEND)
+    fake_build_frontend.build_interpreters = ['fake-python', 'other-python']
+
+    manifest = packaging.build_distributions(fake_build_frontend)
+
+    builds_log = tmp_path.joinpath('bin', 'builds.log')
+    assert 3 == len(builds_log.read_text().splitlines())
+    assert [
+        'dist/test_app-0.0.1.tar.gz',
+        'dist/test_app-0.0.1-py3-none-any.whl',
+    ] == [artifact.path.as_posix() for artifact in manifest]
+    assert 'fake-python' == manifest[1].interpreter
+
+
+def test_copy_source_tree_skips_environments(python_module, tmp_path):
+    for environment_file in ['venv/bin/python', '.venv/bin/python', 'node_modules/x']:
+        Path(environment_file).parent.mkdir(parents=True)
+        Path(environment_file).write_text('')
+
+    source_directory = packaging.copy_source_tree(tmp_path.joinpath('src'))
+
+    assert source_directory.joinpath('setup.py').exists()
+    assert not any(
+        source_directory.joinpath(environment).exists()
+        for environment in ['venv', '.venv', 'node_modules']
+    )
+
+
+def test_build_distributions_reuses_cached_builds(
+    python_module, fake_build_frontend, tmp_path
+):
+    builds_log = tmp_path.joinpath('bin', 'builds.log')
+
+    first_manifest = packaging.build_distributions(fake_build_frontend)
+    assert 2 == len(builds_log.read_text().splitlines())
+
+    assert first_manifest == packaging.build_distributions(fake_build_frontend)
+    assert 2 == len(builds_log.read_text().splitlines())
+
+    with open('setup.py', 'a') as setup_py:
+        setup_py.write(')')
+    packaging.build_distributions(fake_build_frontend)
+    assert 4 == len(builds_log.read_text().splitlines())
+
+
+def test_artifact_cache_evicts_least_recently_used(tmp_path):
+    cache = artifact_cache.ArtifactCache(directory=tmp_path, max_size=1500)
+
+    for key in ['first', 'second']:
+        artifact_path = tmp_path.joinpath(f'{key}.whl')
+        artifact_path.write_text('1' * 1000)
+        cache.put(key, [packaging.Artifact.from_path(artifact_path, 'wheel')])
+
+    assert not cache.entry('first').exists()
+    (artifact,) = cache.get('second', packaging.Artifact, tmp_path.joinpath('dist'))
+    assert 'second.whl' == artifact.name
+    assert '1' * 1000 == artifact.path.read_text()
+
+
+def test_build_distributions_reports_failures(git_repo, fake_build_frontend):
+    with pytest.raises(Exception, match='Error building packages'):
+        packaging.build_distributions(fake_build_frontend)
+
+
+def test_build_distributions_without_a_build_frontend(
+    python_module, fake_build_frontend, fake_executable
+):
+    fake_executable(
+        'fake-python',
+        '#!/bin/sh\necho "fake-python: No module named build" >&2\nexit 1\n',
+    )
+
+    with pytest.raises(
+        Exception,
+        match='fake-python has no build frontend, '
+        'install it with `fake-python -m pip install build`',
+    ):
+        packaging.build_distributions(fake_build_frontend)
+
+
 def test_install_package():
     with CliRunner().isolated_filesystem():
         packaging.install_package(context)
@@ -20,6 +147,46 @@ def test_upload_package():
         packaging.upload_package(context)
 
 
+def test_upload_package_skips_existing_files(
+    python_module, fake_build_frontend, mocker
+):
+    dry_run = mocker.patch('changes.shell.dry_run')
+
+    packaging.upload_package(fake_build_frontend)
+
+    dry_run.assert_called_once_with(
+        'twine upload --skip-existing dist/test_app-0.0.1.tar.gz '
+        'dist/test_app-0.0.1-py3-none-any.whl',
+        False,
+    )
+
+
 def test_install_from_pypi():
     with CliRunner().isolated_filesystem():
         packaging.install_from_pypi(context)
+
+
+def test_install_package_verifies_each_distribution_in_isolation(
+    python_module, fake_build_frontend, mocker, tmp_path
+):
+    venv_directories = []
+
+    @contextlib.contextmanager
+    def verification_venv(interpreter):
+        venv_directories.append(tmp_path.joinpath(f'venv-{len(venv_directories)}'))
+        yield str(venv_directories[-1])
+
+    def install(package_name, venv_dir):
+        if package_name.endswith('.tar.gz'):
+            raise Exception('broken sdist')
+
+    mocker.patch.object(packaging.venv, 'verification_venv', verification_venv)
+    install = mocker.patch.object(packaging.venv, 'install', side_effect=install)
+
+    with pytest.raises(Exception, match='test_app-0.0.1.tar.gz: broken sdist'):
+        packaging.install_package(fake_build_frontend)
+
+    assert 2 == len(set(venv_directories))
+    assert {str(venv_dir) for venv_dir in venv_directories} == {
+        venv_dir for _, venv_dir in (call.args for call in install.call_args_list)
+    }
@@ -44,3 +44,36 @@ def test_fails_for_missing_readme(python_module):
     with CliRunner().isolated_filesystem():
         with pytest.raises(exceptions.ProbeException):
             probe.has_readme()
+
+
+def test_probe_project_reports_every_failure(git_repo):
+    with pytest.raises(exceptions.ProbeException) as e:
+        probe.probe_project('test_app')
+
+    failures = str(e.value).splitlines()
+    assert 'Your project needs a setup.py' in failures
+    assert (
+        'Your test_app/__init__.py must contain __version__ and __url__ attributes'
+        in failures
+    )
+
+
+def test_probe_project_caches_outcomes(python_module, mocker):
+    assert probe.probe_project('test_app')
+
+    has_setup = mocker.spy(probe, 'has_setup')
+    assert probe.probe_project('test_app')
+    assert not has_setup.called
+
+    os.remove('setup.py')
+    with pytest.raises(exceptions.ProbeException) as e:
+        probe.probe_project('test_app')
+    assert 'Your project needs a setup.py' in str(e.value)
+
+
+def test_has_signing_key_is_cached(git_repo, mocker):
+    assert not probe.has_signing_key(None)
+
+    has_signing_key = mocker.spy(probe, '_has_signing_key')
+    assert not probe.has_signing_key(None)
+    assert not has_signing_key.called
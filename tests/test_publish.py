@@ -1,3 +1,4 @@
+import json
 import shlex
 import textwrap
 from datetime import date
@@ -19,6 +20,13 @@ from .conftest import (
     github_merge_commit,
 )
 
+DRAFT_RELEASE_JSON = {
+    'id': 1,
+    'url': f'{RELEASES_URL}/1',
+    'upload_url': 'foo',
+    'draft': True,
+}
+
 
 @pytest.fixture
 def answer_prompts(mocker):
@@ -60,7 +68,14 @@ def test_publish(capsys, configured, answer_prompts):
     responses.add(
         responses.POST,
         RELEASES_URL,
-        json={'upload_url': 'foo'},
+        json=DRAFT_RELEASE_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.PATCH,
+        DRAFT_RELEASE_JSON['url'],
+        json=dict(DRAFT_RELEASE_JSON, draft=False),
         status=200,
         content_type='application/json',
     )
@@ -81,11 +96,11 @@ def test_publish(capsys, configured, answer_prompts):
     pre = textwrap.dedent(
         """\
         Staging [fix] release for version 0.0.2...
-        Running: bumpversion --verbose --allow-dirty --no-commit --no-tag patch...
+        Updating version to 0.0.2 in version.txt .bumpversion.cfg...
         Generating Release...
         Writing release notes to {release_notes_path}...
         Publishing release 0.0.2...
-        Running: git add version.txt .bumpversion.cfg {release_notes_path}...
+        Running: git add version.txt .bumpversion.cfg {release_notes_path} docs/releases/manifest.json...
         Running: git commit --message="# 0.0.2 ({release_date}) Icarus
         """.format(
             release_notes_path=release_notes_path, release_date=date.today().isoformat()
@@ -102,8 +117,9 @@ def test_publish(capsys, configured, answer_prompts):
         """\
         "...
         Running: git tag 0.0.2...
-        Running: git push --tags...
-        Creating GitHub Release...
+        Creating draft GitHub Release...
+        Pushing release 0.0.2 to origin...
+        Publishing GitHub Release...
         Published release 0.0.2...
         """
     ).splitlines()
@@ -131,3 +147,214 @@ def test_publish(capsys, configured, answer_prompts):
     ]
 
     assert expected_release_notes == release_notes_path.read_text().splitlines()
+
+
+@responses.activate
+def test_publish_fast(capsys, configured, answer_prompts):
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=BUG_LABEL_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.POST,
+        RELEASES_URL,
+        json=DRAFT_RELEASE_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.PATCH,
+        DRAFT_RELEASE_JSON['url'],
+        json=dict(DRAFT_RELEASE_JSON, draft=False),
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    stage.stage(
+        draft=False, release_name='Icarus', release_description='The first flight'
+    )
+    capsys.readouterr()
+
+    publish.publish(fast=True)
+
+    out, _ = capsys.readouterr()
+    assert 'Committing and tagging release 0.0.2 in one transaction...' in out
+    assert 'Running: git commit' not in out
+    assert 'Published release 0.0.2...' in out
+
+    assert git(shlex.split('rev-parse HEAD')) == git(
+        shlex.split('rev-parse 0.0.2^{commit}')
+    )
+    assert '' == git(shlex.split('status --porcelain'))
+
+    assert json.loads(responses.calls[-2].request.body)['draft']
+    assert {'draft': False} == json.loads(responses.calls[-1].request.body)
+
+
+@responses.activate
+def test_failed_push_deletes_the_draft_release(capsys, configured, answer_prompts):
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=BUG_LABEL_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.POST,
+        RELEASES_URL,
+        json=DRAFT_RELEASE_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(responses.DELETE, DRAFT_RELEASE_JSON['url'], status=204)
+
+    changes.initialise()
+    stage.stage(
+        draft=False, release_name='Icarus', release_description='The first flight'
+    )
+    changes.project_settings.repository.push = lambda version: 1 / 0
+
+    with pytest.raises(ZeroDivisionError):
+        publish.publish()
+
+    out, _ = capsys.readouterr()
+    assert 'Deleting draft GitHub Release...' in out
+    assert 'DELETE' == responses.calls[-1].request.method
+
+
+@responses.activate
+def test_publish_conventional_commits(capsys, configured, answer_prompts):
+    Path('.changes.toml').write_text(
+        textwrap.dedent(
+            """\
+        [changes]
+        releases_directory = "docs/releases"
+        conventional_commits = true
+        """
+        )
+    )
+    git('add', '.changes.toml')
+    git('commit', '-m', 'fix: release from conventional commits')
+    responses.add(
+        responses.POST,
+        RELEASES_URL,
+        json=DRAFT_RELEASE_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.PATCH,
+        DRAFT_RELEASE_JSON['url'],
+        json=dict(DRAFT_RELEASE_JSON, draft=False),
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    stage.stage(draft=False)
+    assert changes.settings is None
+    assert not responses.calls
+
+    publish.publish()
+
+    out, _ = capsys.readouterr()
+    assert 'Publishing GitHub Release...' in out
+    assert 'Published release 0.0.2...' in out
+    assert 'token foo' == responses.calls[0].request.headers['Authorization']
+    assert json.loads(responses.calls[0].request.body)['draft']
+    assert {'draft': False} == json.loads(responses.calls[-1].request.body)
+
+
+@responses.activate
+def test_publish_release_staged_without_a_manifest(capsys, configured, answer_prompts):
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=BUG_LABEL_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.POST,
+        RELEASES_URL,
+        json=DRAFT_RELEASE_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.PATCH,
+        DRAFT_RELEASE_JSON['url'],
+        json=dict(DRAFT_RELEASE_JSON, draft=False),
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    stage.stage(draft=False)
+    Path('docs/releases/manifest.json').unlink()
+
+    publish.publish()
+
+    release_notes_path = f'docs/releases/0.0.2-{date.today().isoformat()}.md'
+    assert release_notes_path in git(shlex.split('show --name-only 0.0.2'))
+    assert 'docs/releases/manifest.json' in git(shlex.split('show --name-only 0.0.2'))
+
+
+
+@responses.activate
+def test_publish_without_release_notes(capsys, configured):
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=BUG_LABEL_JSON,
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    stage.stage(draft=False)
+    for release_file in Path('docs/releases').iterdir():
+        release_file.unlink()
+    capsys.readouterr()
+
+    publish.publish()
+
+    out, _ = capsys.readouterr()
+    assert 'No release notes for 0.0.2, run `changes stage` first\n' == out
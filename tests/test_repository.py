@@ -1,7 +1,19 @@
+from pathlib import Path
+
+import pytest
+import responses
 from plumbum.cmd import git
+from plumbum.commands import ProcessExecutionError
 from semantic_version import Version
 
-from changes.models.repository import GitRepository
+from changes.models.repository import (
+    NOTES_REF,
+    ConventionalCommitRepository,
+    GitHubRepository,
+    GitRepository,
+)
+
+from .conftest import ISSUE_URL, PULL_REQUEST_JSON, github_merge_commit
 
 
 def test_repository_parses_remote_url(git_repo):
@@ -41,3 +53,100 @@ def test_latest_version(git_repo):
     assert expected_versions == repository.versions
 
     assert Version('0.0.3') == repository.latest_version
+
+
+def test_conventional_commits_since_latest_version(git_repo):
+    for message in [
+        'feat(cli): add a status command',
+        'Tidy up',
+        'fix!: drop the legacy flag\n\nBREAKING CHANGE: --legacy is gone',
+    ]:
+        git('commit', '--allow-empty', '-m', message)
+
+    commits = ConventionalCommitRepository().pull_requests_since_latest_version
+
+    assert ['fix!: drop the legacy flag', 'feat(cli): add a status command'] == [
+        commit.title for commit in commits
+    ]
+    assert 'BREAKING CHANGE: --legacy is gone' == commits[0].description
+    assert [['fix', 'breaking'], ['feat']] == [commit.label_names for commit in commits]
+    assert 'cli' == commits[1].scope
+    assert 'Your Name' == commits[1].author
+
+
+@responses.activate
+def test_pull_requests_are_shared_as_git_notes(git_repo):
+    # fetch from the local remote that is pushed to
+    push_url = git('remote', 'get-url', '--push', 'origin').strip()
+    remote_url = git('remote', 'get-url', 'origin').strip()
+    git('config', f'url.{push_url}.insteadOf', remote_url)
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+
+    repository = GitHubRepository(auth_token='foo', pull_request_notes=True)
+    [pull_request] = repository.pull_requests_since_latest_version
+    assert 1 == len(responses.calls)
+    assert repository.push_notes()
+
+    # another clone, without the notes, reads them from the remote
+    git('update-ref', '-d', NOTES_REF)
+    repository = GitHubRepository(auth_token='foo', pull_request_notes=True)
+    assert [pull_request] == repository.pull_requests_since_latest_version
+    assert 1 == len(responses.calls)
+
+
+def test_commit_and_tag_in_one_transaction(git_repo):
+    Path('version.txt').write_text('0.0.2')
+
+    commit, _ = GitRepository.commit_and_tag(['version.txt'], '# 0.0.2', '0.0.2')
+
+    assert commit == git('rev-parse', 'HEAD').strip()
+    assert commit == git('rev-parse', '0.0.2^{commit}').strip()
+    assert '# 0.0.2' == git('log', '-1', '--format=%B').strip()
+    assert '' == git('status', '--porcelain')
+
+
+def test_commit_and_tag_rolls_back_a_failed_transaction(git_repo, caplog):
+    head = git('rev-parse', 'HEAD').strip()
+    git('tag', '0.0.2')
+    Path('version.txt').write_text('0.0.2')
+
+    with pytest.raises(ProcessExecutionError):
+        GitRepository.commit_and_tag(['version.txt'], '# 0.0.2', '0.0.2')
+
+    assert head == git('rev-parse', 'HEAD').strip()
+    assert ' M version.txt\n' == git('status', '--porcelain')
+    assert 'Rolled back release commit and tag 0.0.2' in caplog.text
+
+
+def test_commit_and_tag_fails_before_the_transaction(git_repo, caplog):
+    # git only adds the files in a directory
+    Path('docs').mkdir()
+    with pytest.raises(ProcessExecutionError):
+        GitRepository.commit_and_tag(['docs'], '# 0.0.2', '0.0.2')
+
+    assert 'Rolled back' not in caplog.text
+    assert '' == git('tag', '--list', '0.0.2')
+
+
+def test_push_only_the_release_refs(git_repo):
+    git('tag', 'stray')
+    git('commit', '--allow-empty', '-m', 'Release 0.0.2')
+    git('tag', '--annotate', '0.0.2', '--message', '0.0.2')
+    repository = GitRepository()
+
+    assert repository.push('0.0.2')
+
+    remote_refs = git('ls-remote', repository.push_url)
+    assert 'refs/tags/0.0.2' in remote_refs
+    assert 'refs/tags/stray' not in remote_refs
+    assert git('rev-parse', 'HEAD').strip() in remote_refs
+
+    # the cached snapshot shows the remote already has the release
+    assert not repository.push('0.0.2')
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from changes.scheduler import Pipeline, Step
+
+
+def test_independent_steps_overlap():
+    both_started = threading.Barrier(2, timeout=5)
+    pipeline = Pipeline(
+        [
+            Step('tests', both_started.wait),
+            Step('changelog', both_started.wait),
+            Step('build', lambda: 'built', ['tests', 'changelog']),
+        ]
+    )
+
+    assert 'built' == pipeline.run()['build']
+    assert pipeline.timings['build'].start >= max(
+        pipeline.timings[name].end for name in ['tests', 'changelog']
+    )
+    assert 'build' == pipeline.critical_path()[-1]
+    assert pipeline.critical_path_report().startswith('Critical path')
+
+
+def test_failure_stops_dependent_steps():
+    ran = []
+
+    def fail():
+        raise Exception('upload failed')
+
+    pipeline = Pipeline(
+        [
+            Step('upload', fail),
+            Step('publish', lambda: ran.append('publish'), ['upload']),
+            Step('changelog', lambda: ran.append('changelog')),
+        ]
+    )
+
+    with pytest.raises(Exception, match='upload failed'):
+        pipeline.run()
+    assert 'publish' not in ran
+    assert 'publish' not in pipeline.timings
+
+
+def test_critical_path_follows_latest_dependency():
+    pipeline = Pipeline(
+        [
+            Step('tests', lambda: None),
+            Step('version', lambda: None, ['tests']),
+            Step('changelog', lambda: None),
+            Step('build', lambda: None, ['version', 'changelog']),
+        ]
+    )
+    pipeline.run()
+    slowest = max(['version', 'changelog'], key=lambda name: pipeline.timings[name].end)
+
+    assert slowest == pipeline.critical_path()[-2]
+    assert 'build' == pipeline.critical_path()[-1]
+
+
+@pytest.mark.parametrize(
+    'steps',
+    [
+        [Step('a', None, ['b']), Step('b', None, ['a'])],
+        [Step('a', None, ['missing'])],
+    ],
+)
+def test_invalid_pipelines(steps):
+    with pytest.raises(ValueError):
+        Pipeline(steps)
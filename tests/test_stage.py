@@ -42,16 +42,25 @@ def test_stage_draft(capsys, configured):
     stage.stage(draft=True)
 
     release_notes_path = Path(f'docs/releases/0.0.2-{date.today().isoformat()}.md')
-    expected_output = textwrap.dedent(
-        """\
-        Staging [fix] release for version 0.0.2...
-        Running: bumpversion --dry-run --verbose --no-commit --no-tag --allow-dirty patch...
-        Generating Release...
-        Would have created {}:...
-        """.format(
-            release_notes_path
-        )
-    )
+    expected_output = [
+        'Staging [fix] release for version 0.0.2...',
+        'Would have updated version to 0.0.2 in version.txt .bumpversion.cfg:...',
+        '--- version.txt',
+        '+++ version.txt',
+        '@@ -1 +1 @@',
+        '-0.0.1',
+        '+0.0.2...',
+        '--- .bumpversion.cfg',
+        '+++ .bumpversion.cfg',
+        '@@ -1,4 +1,4 @@',
+        ' [bumpversion]',
+        '-current_version = 0.0.1',
+        '+current_version = 0.0.2',
+        ' ',
+        ' [bumpversion:file:version.txt]...',
+        'Generating Release...',
+        f'Would have created {release_notes_path}:...',
+    ]
 
     expected_release_notes_content = [
         f'# 0.0.2 ({date.today().isoformat()})',
@@ -65,7 +74,7 @@ def test_stage_draft(capsys, configured):
     out, _ = capsys.readouterr()
 
     assert (
-        expected_output.splitlines() + expected_release_notes_content
+        expected_output + expected_release_notes_content
         == out.splitlines()
     )
 
@@ -103,7 +112,7 @@ def test_stage(capsys, configured):
     expected_output = textwrap.dedent(
         """\
         Staging [fix] release for version 0.0.2...
-        Running: bumpversion --verbose --allow-dirty --no-commit --no-tag patch...
+        Updating version to 0.0.2 in version.txt .bumpversion.cfg...
         Generating Release...
         Writing release notes to {}...
         """.format(
@@ -186,7 +195,7 @@ def test_stage_discard(capsys, configured):
     expected_output = textwrap.dedent(
         """\
         Staging [fix] release for version 0.0.2...
-        Running: bumpversion --verbose --allow-dirty --no-commit --no-tag patch...
+        Updating version to 0.0.2 in version.txt .bumpversion.cfg...
         Generating Release...
         Writing release notes to {release_notes_path}...
         Discarding currently staged release 0.0.2...
@@ -219,3 +228,41 @@ def test_stage_discard_nothing_staged(capsys, configured):
     )
     out, _ = capsys.readouterr()
     assert expected_output == out
+
+
+@responses.activate
+def test_stage_discard_keeps_other_config_changes(capsys, configured):
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=BUG_LABEL_JSON,
+        status=200,
+        content_type='application/json',
+    )
+
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    stage.stage(
+        draft=False, release_name='Icarus', release_description='The first flight'
+    )
+    with open('.bumpversion.cfg', 'a') as config_file:
+        config_file.write('\n[bumpversion:file:README.md]\n')
+    capsys.readouterr()
+
+    stage.discard(release_name='Icarus', release_description='The first flight')
+
+    out, _ = capsys.readouterr()
+    assert (
+        '.bumpversion.cfg has changes besides the version, '
+        'commit or stash them before discarding\n'
+    ) in out
+    assert '[bumpversion:file:README.md]' in open('.bumpversion.cfg').read()
+    assert '0.0.2' == open('version.txt').read()
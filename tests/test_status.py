@@ -1,6 +1,8 @@
 import textwrap
+from pathlib import Path
 
 import responses
+from plumbum.cmd import git
 
 import changes
 from changes.commands import status
@@ -82,3 +84,30 @@ def test_status_with_changes(capsys, configured):
     )
     out, _ = capsys.readouterr()
     assert expected_output == out
+
+
+@responses.activate
+def test_status_with_conventional_commits(capsys, git_repo):
+    Path('.changes.toml').write_text(
+        textwrap.dedent(
+            """\
+        [changes]
+        releases_directory = "docs/releases"
+        conventional_commits = true
+        """
+        )
+    )
+    Path('.bumpversion.cfg').write_text(
+        '[bumpversion]\ncurrent_version = 0.0.1\n\n[bumpversion:file:version.txt]\n'
+    )
+    git('add', '.changes.toml', '.bumpversion.cfg')
+    git('commit', '-m', 'feat: add changes configuration files')
+
+    changes.initialise()
+    status.status()
+
+    out, _ = capsys.readouterr()
+    assert '1 changes found since 0.0.1' in out
+    assert 'feat: add changes configuration files by @Your Name [feat]' in out
+    assert 'Proposed version bump 0.0.1 => 0.1.0...' in out
+    assert not responses.calls
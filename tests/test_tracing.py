@@ -0,0 +1,78 @@
+import json
+from pathlib import Path
+
+import responses
+from click.testing import CliRunner
+
+from changes import tracing
+from changes.cli import main
+
+from .conftest import LABEL_URL
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = tracing.Tracer()
+    with tracer.span('outer') as span:
+        assert span is None
+    assert [] == tracer.spans
+
+
+def test_nested_spans():
+    tracer = tracing.Tracer()
+    tracer.enable()
+
+    with tracer.span('outer'):
+        with tracer.span('inner', 'git', command='status'):
+            pass
+        with tracer.span('inner', 'git'):
+            pass
+
+    inner, _, outer = tracer.spans
+    assert 1 == inner.depth
+    assert 0 == outer.depth
+    assert outer.self_duration <= outer.duration
+    assert {'command': 'status'} == inner.args
+
+    events = tracer.trace_events()
+    assert ['outer', 'inner', 'inner'] == [event['name'] for event in events]
+    assert {'X'} == {event['ph'] for event in events}
+
+    (name, total), _ = sorted(tracer.summary(), key=lambda item: item[0])
+    assert 'inner' == name
+    assert 2 == total['calls']
+
+
+def test_traced_decorator(monkeypatch):
+    tracer = tracing.Tracer()
+    tracer.enable()
+    monkeypatch.setattr(tracing, 'tracer', tracer)
+
+    @tracing.traced('github.labels', 'http')
+    def labels():
+        return ['bug']
+
+    assert ['bug'] == labels()
+    assert ['github.labels'] == [span.name for span in tracer.spans]
+
+
+@responses.activate
+def test_profile_option_writes_chrome_trace(configured, mocker, monkeypatch):
+    monkeypatch.setattr(tracing, 'tracer', tracing.Tracer())
+    mocker.patch('changes.cli.requests_cache')
+    responses.add(
+        responses.GET,
+        LABEL_URL,
+        json=[],
+        status=200,
+        content_type='application/json',
+    )
+
+    result = CliRunner().invoke(main, ['--profile', 'trace.json', 'status'])
+
+    assert 0 == result.exit_code, result.output
+    assert 'Wrote trace events to trace.json' in result.output
+
+    trace_events = json.loads(Path('trace.json').read_text())['traceEvents']
+    span_names = {event['name'] for event in trace_events}
+    assert 'changes status' in span_names
+    assert 'git tag' in span_names
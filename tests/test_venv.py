@@ -0,0 +1,54 @@
+import os
+import subprocess
+from pathlib import Path
+
+from changes import venv
+
+
+def test_clone_relocates_environment(tmp_path, mocker):
+    build_base_venv = mocker.spy(venv, 'build_base_venv')
+
+    first_clone = venv.create_venv(str(tmp_path / 'first'))
+    second_clone = venv.create_venv(str(tmp_path / 'second'))
+
+    assert 1 == build_base_venv.call_count
+    for clone in (first_clone, second_clone):
+        prefix = subprocess.check_output(
+            [
+                str(Path(clone, venv.BIN_DIRECTORY, 'python')),
+                '-c',
+                'import sys; print(sys.prefix)',
+            ],
+            universal_newlines=True,
+        ).strip()
+        assert os.path.realpath(clone) == os.path.realpath(prefix)
+        pip_script = Path(clone, venv.BIN_DIRECTORY, 'pip').read_text()
+        assert pip_script.startswith(f'#!{clone}')
+
+
+def test_verification_venv_removes_clone():
+    with venv.verification_venv() as venv_dir:
+        assert Path(venv_dir, 'pyvenv.cfg').exists()
+    assert not Path(venv_dir).exists()
+
+
+def test_prune_pool_removes_stale_base_environments(tmp_path):
+    stale = tmp_path / 'stale'
+    stale.mkdir()
+    stale.joinpath(venv.BASE_VENV_MARKER).touch()
+    os.utime(stale / venv.BASE_VENV_MARKER, (0, 0))
+    incomplete = tmp_path / 'incomplete'
+    incomplete.mkdir()
+    fresh = tmp_path / 'fresh'
+    fresh.mkdir()
+    fresh.joinpath(venv.BASE_VENV_MARKER).touch()
+
+    venv.prune_pool(tmp_path)
+
+    assert [fresh] == list(tmp_path.iterdir())
+
+
+def test_run_prefers_environment_executables():
+    with venv.verification_venv() as venv_dir:
+        output = venv.run('python -c print(__import__("sys").prefix)', venv_dir)
+    assert os.path.realpath(venv_dir) == os.path.realpath(output.strip())
@@ -0,0 +1,86 @@
+import textwrap
+import time
+
+import pytest
+from plumbum.commands import ProcessExecutionError
+
+from changes import verification
+
+
+@pytest.fixture
+def test_suite(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def write_test_module(name, *test_bodies):
+        tmp_path.joinpath(f'test_{name}.py').write_text(
+            'import time\n\n' + ''.join(textwrap.dedent(f"""
+                    def test_{name}_{index}():
+                        {body}
+                    """) for index, body in enumerate(test_bodies))
+        )
+
+    return write_test_module
+
+
+def test_shard_tests_balances_by_test_count():
+    test_files = {
+        'test_a.py': ['a'] * 5,
+        'test_b.py': ['b'] * 3,
+        'test_c.py': ['c'] * 2,
+        'test_d.py': ['d'],
+    }
+
+    assert [['test_a.py', 'test_d.py'], ['test_b.py', 'test_c.py']] == (
+        verification.shard_tests(test_files, 2)
+    )
+    assert 4 == len(verification.shard_tests(test_files, 8))
+
+
+def test_run_sharded_tests(test_suite):
+    test_suite('first', 'assert True', 'assert True')
+    test_suite('second', 'assert True')
+
+    output = verification.run_tests(sharded=True, workers=2)
+
+    assert '2 passed' in output
+    assert '1 passed' in output
+
+
+def test_run_sharded_tests_fails_fast(test_suite):
+    test_suite('failing', 'assert False')
+    test_suite('slow', 'time.sleep(60)')
+
+    start = time.monotonic()
+    with pytest.raises(ProcessExecutionError, match='test_failing_0'):
+        verification.run_tests(sharded=True, workers=2)
+    assert time.monotonic() - start < 30
+
+
+@pytest.fixture
+def fake_tox(fake_executable, tmp_path):
+    runs_log = tmp_path.joinpath('bin', 'runs.log')
+    fake_executable('tox', f'#!/bin/sh\necho run >> {runs_log}\necho passed\n')
+    return runs_log
+
+
+def test_run_tests_reuses_result_for_identical_tree(git_repo, fake_tox):
+    def runs():
+        return len(fake_tox.read_text().splitlines())
+
+    assert 'passed' in verification.run_tests()
+    assert 'passed' in verification.run_tests()
+    assert 1 == runs()
+
+    verification.run_tests(force=True)
+    assert 2 == runs()
+
+    # the changelog is written while the tests run, it isn't tested
+    with open('CHANGELOG.md', 'a') as changelog:
+        changelog.write('# 0.0.2')
+    verification.run_tests()
+    assert 2 == runs()
+
+    with open('README.md', 'a') as readme:
+        readme.write('More.')
+    verification.run_tests()
+    assert 3 == runs()
@@ -0,0 +1,198 @@
+import os
+import textwrap
+
+import pytest
+
+from changes import models, version_files
+from changes.models import BumpVersion
+
+
+@pytest.fixture
+def versioned_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tmp_path.joinpath('version.txt').write_bytes(b'0.0.1\r\n')
+    tmp_path.joinpath('setup.py').write_text("setup(version='0.0.1')\n")
+    bumpversion = BumpVersion(
+        current_version='0.0.1', version_files_to_replace=['version.txt', 'setup.py']
+    )
+    bumpversion.write_to_file(bumpversion.config_path)
+    return bumpversion
+
+
+def test_plan_does_not_write(versioned_files):
+    changes = version_files.plan_version_changes(versioned_files, '0.1.0')
+
+    assert ['version.txt', 'setup.py', '.bumpversion.cfg'] == [
+        str(change.path) for change in changes
+    ]
+    assert '+0.1.0' in changes[0].diff
+    assert b'0.0.1\r\n' == open('version.txt', 'rb').read()
+
+
+def test_apply_writes_every_file(versioned_files):
+    version_files.apply_version_changes(
+        version_files.plan_version_changes(versioned_files, '0.1.0')
+    )
+
+    assert b'0.1.0\r\n' == open('version.txt', 'rb').read()
+    assert "setup(version='0.1.0')\n" == open('setup.py').read()
+    assert '0.1.0' == BumpVersion.discover().current_version
+    assert ['.bumpversion.cfg', 'setup.py', 'version.txt'] == sorted(os.listdir())
+
+
+def test_missing_version_raises(versioned_files):
+    open('setup.py', 'w').write('setup()\n')
+
+    with pytest.raises(Exception, match='Did not find 0.0.1 in setup.py'):
+        version_files.plan_version_changes(versioned_files, '0.1.0')
+
+
+def test_partial_failure_rolls_back(versioned_files, mocker):
+    changes = version_files.plan_version_changes(versioned_files, '0.1.0')
+    replace = os.replace
+
+    def fail_on_setup_py(source, destination):
+        if str(destination) == 'setup.py':
+            raise OSError('disk full')
+        replace(source, destination)
+
+    mocker.patch.object(version_files.os, 'replace', side_effect=fail_on_setup_py)
+
+    with pytest.raises(OSError, match='disk full'):
+        version_files.apply_version_changes(changes)
+
+    assert b'0.0.1\r\n' == open('version.txt', 'rb').read()
+    assert "setup(version='0.0.1')\n" == open('setup.py').read()
+    assert ['.bumpversion.cfg', 'setup.py', 'version.txt'] == sorted(os.listdir())
+
+
+def test_discovers_pyproject_configuration(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tmp_path.joinpath('version.txt').write_text('0.0.1\n')
+    tmp_path.joinpath('setup.cfg').write_text('[metadata]\nname = test_app\n')
+    tmp_path.joinpath('pyproject.toml').write_text(textwrap.dedent("""\
+            [tool.bumpversion]
+            current_version = "0.0.1"
+
+            [[tool.bumpversion.files]]
+            filename = "version.txt"
+            """))
+
+    bumpversion = BumpVersion.discover()
+    assert (
+        BumpVersion(
+            current_version='0.0.1',
+            version_files_to_replace=['version.txt'],
+            config_path='pyproject.toml',
+        )
+        == bumpversion
+    )
+    version_files.apply_version_changes(
+        version_files.plan_version_changes(bumpversion, '0.1.0')
+    )
+
+    assert '0.1.0' == BumpVersion.discover().current_version
+    assert 'current_version = "0.1.0"' in open('pyproject.toml').read()
+
+
+def test_configuration_is_parsed_once_per_revision(versioned_files, mocker):
+    read_bumpversion_settings = mocker.spy(models, 'read_bumpversion_settings')
+
+    BumpVersion.discover().version_files_to_replace.append('mutated')
+    assert ['version.txt', 'setup.py'] == (
+        BumpVersion.discover().version_files_to_replace
+    )
+    assert 1 == read_bumpversion_settings.call_count
+
+    open('.bumpversion.cfg', 'a').write('\n[bumpversion:file:README.md]\n')
+    assert 'README.md' in BumpVersion.discover().version_files_to_replace
+    assert 2 == read_bumpversion_settings.call_count
+
+
+def test_config_file_that_is_also_a_version_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tmp_path.joinpath('setup.cfg').write_text(textwrap.dedent("""\
+            [metadata]
+            name = test_app
+            version = 0.1.0
+
+            [bumpversion]
+            current_version = 0.1.0
+
+            [bumpversion:file:setup.cfg]
+            """))
+
+    bumpversion = BumpVersion.discover()
+    changes = version_files.plan_version_changes(bumpversion, '0.2.0')
+    assert ['setup.cfg'] == [str(change.path) for change in changes]
+
+    version_files.apply_version_changes(changes)
+
+    content = open('setup.cfg').read()
+    assert 'version = 0.2.0\n' in content
+    assert 'current_version = 0.2.0\n' in content
+    assert '0.1.0' not in content
+
+
+def test_only_version_changed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    committed_content = textwrap.dedent("""\
+            [metadata]
+            version = 0.1.0
+
+            [bumpversion]
+            current_version = 0.1.0
+
+            [bumpversion:file:setup.cfg]
+            """).encode('utf-8')
+    tmp_path.joinpath('setup.cfg').write_bytes(committed_content)
+    version_files.apply_version_changes(
+        version_files.plan_version_changes(BumpVersion.discover(), '0.2.0')
+    )
+
+    assert version_files.only_version_changed(
+        BumpVersion.discover(), committed_content
+    )
+
+    open('setup.cfg', 'a').write('\n[flake8]\nmax-line-length = 88\n')
+    assert not version_files.only_version_changed(
+        BumpVersion.discover(), committed_content
+    )
+
+
+def test_search_and_replace_options(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tmp_path.joinpath('requirements.txt').write_text(
+        'test_app==0.1.0\nother_app==0.1.0\n'
+    )
+    tmp_path.joinpath('setup.cfg').write_text(textwrap.dedent("""\
+            [tool:custom]
+            current_version = 9.9.9
+
+            [bumpversion]
+            current_version = 0.1.0
+
+            [bumpversion:file:requirements.txt]
+            search = test_app=={current_version}
+            replace = test_app=={new_version}
+            """))
+
+    version_files.apply_version_changes(
+        version_files.plan_version_changes(BumpVersion.discover(), '0.2.0')
+    )
+
+    assert 'test_app==0.2.0\nother_app==0.1.0\n' == open('requirements.txt').read()
+    content = open('setup.cfg').read()
+    assert 'current_version = 9.9.9\n' in content
+    assert '[bumpversion]\ncurrent_version = 0.2.0\n' in content
+
+
+@pytest.mark.parametrize(
+    'option', ['serialize = {major}.{minor}', 'search = v{major}.{minor}']
+)
+def test_unsupported_options_raise(versioned_files, option):
+    open('.bumpversion.cfg', 'a').write(f'\n\n[bumpversion:file:README.md]\n{option}\n')
+    open('README.md', 'w').write('v0.0 (0.0.1)')
+
+    with pytest.raises(Exception, match='README.md'):
+        version_files.plan_version_changes(BumpVersion.discover(), '0.1.0')
@@ -0,0 +1,94 @@
+import textwrap
+
+import attr
+import pytest
+import responses
+from plumbum.cmd import git
+
+import changes
+from changes import watch
+from changes.commands import status
+
+from .conftest import ISSUE_URL, PULL_REQUEST_JSON, github_merge_commit
+
+
+@attr.s
+class ScriptedWatcher(object):
+    """Runs one git operation per `wait`, then stops the watch loop"""
+
+    operations = attr.ib()
+    closed = attr.ib(default=False)
+
+    def wait(self, timeout=None):
+        if not self.operations:
+            return False
+        self.operations.pop(0)()
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def test_ref_snapshot_changes(git_repo):
+    snapshot = watch.ref_snapshot()
+    assert 'refs/tags/0.0.1' in snapshot
+    assert snapshot['HEAD'] == snapshot['refs/heads/master']
+
+    git('tag', '0.0.2')
+
+    assert ['refs/tags/0.0.2'] == watch.changed_refs(snapshot, watch.ref_snapshot())
+
+
+def test_polling_watcher_detects_new_tag(git_repo):
+    watcher = watch.PollingWatcher(watch.git_dir(), interval=0.01)
+    assert not watcher.wait(timeout=0.05)
+
+    git('tag', '0.0.2')
+    assert watcher.wait(timeout=1)
+
+
+@pytest.mark.skipif(
+    not watch.InotifyWatcher.load_libc(), reason='inotify is not available'
+)
+def test_inotify_watcher_detects_new_commit(git_repo):
+    watcher = watch.InotifyWatcher(watch.git_dir())
+    try:
+        assert not watcher.wait(timeout=0.05)
+
+        git('commit', '--allow-empty', '-m', 'Another commit')
+        assert watcher.wait(timeout=1)
+    finally:
+        watcher.close()
+
+
+@responses.activate
+def test_watch_only_fetches_new_pull_requests(capsys, configured):
+    github_merge_commit(111)
+    responses.add(
+        responses.GET,
+        ISSUE_URL,
+        json=PULL_REQUEST_JSON,
+        status=200,
+        content_type='application/json',
+    )
+
+    changes.initialise()
+    watcher = ScriptedWatcher([lambda: git('tag', '0.0.2')])
+    status.watch(watcher)
+
+    assert watcher.closed
+    assert 1 == len(responses.calls)
+
+    expected_tail = textwrap.dedent(
+        """\
+        Tags changed: 0.0.2...
+        Status [michaeljoseph/test_app]...
+        Repository: michaeljoseph/test_app...
+        Latest Version...
+        0.0.2
+        Changes...
+        0 changes found since 0.0.2
+        """
+    )
+    out, _ = capsys.readouterr()
+    assert out.endswith(expected_tail)